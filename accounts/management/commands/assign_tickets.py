@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import OfflineSupportTicket
+from accounts.routing import ticket_router
+
+
+class Command(BaseCommand):
+    help = 'Assign unassigned new offline support tickets to the least loaded counselors'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--institution',
+            help='Only assign tickets of the institution with this code',
+        )
+
+    def handle(self, *args, **options):
+        tickets = OfflineSupportTicket.objects.filter(counselor__isnull=True, status='new').order_by('created_at')
+        if options['institution']:
+            tickets = tickets.filter(institution__code=options['institution'])
+
+        assigned = skipped = 0
+        for ticket in tickets.iterator():
+            if ticket_router.assign(ticket) is None:
+                skipped += 1
+            else:
+                assigned += 1
+        self.stdout.write(self.style.SUCCESS(f'Assigned {assigned} tickets ({skipped} left unassigned)'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='offlinesupportticket',
+            index=models.Index(fields=['status', 'scheduled_for'], name='ticket_schedule_idx'),
+        ),
+    ]
@@ -175,6 +175,9 @@ class OfflineSupportTicket(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'scheduled_for'], name='ticket_schedule_idx'),
+        ]
 
     def __str__(self):
         return f"{self.subject} ({self.status})"
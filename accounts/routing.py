@@ -0,0 +1,295 @@
+"""
+Automatic assignment of offline support tickets to counselors.
+
+``TicketRouter`` keeps a live load for every active counselor in memory: open
+tickets (new or scheduled) and hours already scheduled over the next week
+(scheduled tickets plus booked appointments). Counselors sit in one min-heap
+per institution and one per institution and language, ordered by load, so
+picking the least loaded counselor for a new ticket and updating their load
+are O(log n). A load change pushes a fresh heap entry and older entries for
+that counselor are skipped when they reach the top.
+
+Ticket saves and slot bookings and cancellations adjust the counters
+through signals without touching the database. Loads are rebuilt from the database every ``REFRESH_SECONDS`` so
+processes converge on changes made elsewhere (e.g. in another worker).
+When an assignment pushes a counselor over ``MAX_OPEN_TICKETS`` or
+``MAX_SCHEDULED_HOURS`` a ``counselor_overload`` Alert is raised once.
+"""
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('new', 'scheduled')
+
+DEFAULTS = {
+    'AUTO_ASSIGN': True,
+    'MAX_OPEN_TICKETS': 10,
+    'MAX_SCHEDULED_HOURS': 30,
+    # Load added per scheduled hour, relative to one open ticket
+    'HOURS_WEIGHT': 0.5,
+    'REFRESH_SECONDS': 300,
+}
+
+
+def routing_setting(name):
+    return getattr(settings, 'TICKET_ROUTING', {}).get(name, DEFAULTS[name])
+
+
+def session_hours():
+    return getattr(settings, 'BOOKING_SLOT_MINUTES', 60) / 60
+
+
+def ticket_hours(ticket):
+    """Hours ``ticket`` adds to its counselor's load: one session if scheduled within the next week"""
+    if ticket.status != 'scheduled' or ticket.scheduled_for is None:
+        return 0.0
+    now = timezone.now()
+    return session_hours() if now <= ticket.scheduled_for < now + timedelta(days=7) else 0.0
+
+
+@dataclass
+class CounselorLoad:
+    counselor_id: int
+    institution_id: int
+    name: str
+    languages: frozenset = frozenset()
+    open_tickets: int = 0
+    scheduled_hours: float = 0.0
+    stamp: int = 0
+    alerted: bool = field(default=False, compare=False)
+
+    @property
+    def score(self):
+        return self.open_tickets + routing_setting('HOURS_WEIGHT') * self.scheduled_hours
+
+    @property
+    def overloaded(self):
+        return (self.open_tickets >= routing_setting('MAX_OPEN_TICKETS')
+                or self.scheduled_hours >= routing_setting('MAX_SCHEDULED_HOURS'))
+
+
+class TicketRouter:
+    """Least-loaded counselor selection per institution and language"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loads = {}
+        self._heaps = {}
+        # booking_system Counselor id -> Counselor id, for booked slots
+        self._booking_counselors = {}
+        self._built_at = None
+
+    # Building
+
+    def _build(self):
+        from booking_system.models import Appointment, Counselor as BookingCounselor
+
+        from .models import Counselor, OfflineSupportTicket
+
+        loads = {}
+        users = {}
+        counselors = Counselor.objects.filter(is_active=True).prefetch_related('languages')
+        for counselor in counselors:
+            loads[counselor.pk] = CounselorLoad(
+                counselor_id=counselor.pk,
+                institution_id=counselor.institution_id,
+                name=counselor.full_name,
+                languages=frozenset(lang.language_code for lang in counselor.languages.all()),
+            )
+            if counselor.user_id:
+                users[counselor.user_id] = counselor.pk
+
+        tickets = OfflineSupportTicket.objects.filter(
+            counselor_id__in=loads, status__in=OPEN_STATUSES
+        ).values('counselor').annotate(total=Count('pk')).values_list('counselor', 'total')
+        for counselor_id, total in tickets:
+            loads[counselor_id].open_tickets = total
+
+        now = timezone.now()
+        hours = session_hours()
+        scheduled = OfflineSupportTicket.objects.filter(
+            counselor_id__in=loads, status='scheduled',
+            scheduled_for__gte=now, scheduled_for__lt=now + timedelta(days=7),
+        ).values('counselor').annotate(total=Count('pk')).values_list('counselor', 'total')
+        for counselor_id, total in scheduled:
+            loads[counselor_id].scheduled_hours += total * hours
+
+        today = timezone.localdate()
+        appointments = Appointment.objects.filter(
+            counselor__user_id__in=users, status__in=('pending', 'confirmed'),
+            date__gte=today, date__lt=today + timedelta(days=7),
+        ).values('counselor__user_id').annotate(total=Count('pk')).values_list('counselor__user_id', 'total')
+        for user_id, total in appointments:
+            loads[users[user_id]].scheduled_hours += total * hours
+        booking_counselors = BookingCounselor.objects.filter(user_id__in=users).values_list('pk', 'user_id')
+
+        for counselor_id, load in loads.items():
+            previous = self._loads.get(counselor_id)
+            load.alerted = previous is not None and previous.alerted and load.overloaded
+        self._loads = loads
+        self._booking_counselors = {pk: users[user_id] for pk, user_id in booking_counselors}
+        self._heaps = {}
+        for load in loads.values():
+            self._push(load)
+        self._built_at = time.monotonic()
+
+    def _ensure_built(self):
+        if self._built_at is None or time.monotonic() - self._built_at > routing_setting('REFRESH_SECONDS'):
+            self._build()
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    # Heaps
+
+    def _push(self, load):
+        load.stamp += 1
+        entry = (load.score, load.counselor_id, load.stamp)
+        keys = [(load.institution_id, None)]
+        keys.extend((load.institution_id, code) for code in load.languages)
+        for key in keys:
+            heap = self._heaps.setdefault(key, [])
+            heapq.heappush(heap, entry)
+            if len(heap) > 2 * len(self._loads) + 64:
+                # Too many superseded entries; keep the current ones only
+                heap[:] = [e for e in heap if self._loads[e[1]].stamp == e[2]]
+                heapq.heapify(heap)
+
+    def _peek(self, key):
+        heap = self._heaps.get(key)
+        while heap:
+            _, counselor_id, stamp = heap[0]
+            load = self._loads.get(counselor_id)
+            if load is not None and load.stamp == stamp:
+                return load
+            heapq.heappop(heap)
+        return None
+
+    def _choose(self, institution_id, language):
+        matching = self._peek((institution_id, language)) if language else None
+        if matching is not None and not matching.overloaded:
+            return matching
+        least = self._peek((institution_id, None))
+        if matching is None or (least is not None and not least.overloaded):
+            return least
+        return matching
+
+    def _adjust(self, counselor_id, tickets=0, hours=0.0):
+        load = self._loads.get(counselor_id)
+        if load is None:
+            return None
+        load.open_tickets = max(load.open_tickets + tickets, 0)
+        load.scheduled_hours = max(load.scheduled_hours + hours, 0.0)
+        if not load.overloaded:
+            load.alerted = False
+        self._push(load)
+        return load
+
+    # Public API
+
+    def load(self, counselor_id):
+        with self._lock:
+            self._ensure_built()
+            return self._loads.get(counselor_id)
+
+    def ticket_changed(self, old_state, new_state):
+        """
+        Apply a ticket save to the loads. Both states are
+        ``(counselor_id, is_open, hours)``; the counselor may be None.
+        """
+        deltas = {}
+        for (counselor_id, is_open, hours), sign in ((old_state, -1), (new_state, 1)):
+            if counselor_id is not None:
+                tickets, total = deltas.get(counselor_id, (0, 0.0))
+                deltas[counselor_id] = (tickets + sign * is_open, total + sign * hours)
+        with self._lock:
+            if self._built_at is None:
+                return
+            for counselor_id, (tickets, hours) in deltas.items():
+                if tickets or hours:
+                    self._adjust(counselor_id, tickets, hours)
+
+    def slot_changed(self, slot, booked):
+        """Add or remove the hours of a booked or released booking_system slot"""
+        today = timezone.localdate()
+        if not today <= slot.date < today + timedelta(days=7):
+            return
+        with self._lock:
+            if self._built_at is None:
+                return
+            counselor_id = self._booking_counselors.get(slot.counselor_id)
+            if counselor_id is not None:
+                self._adjust(counselor_id, hours=session_hours() if booked else -session_hours())
+
+    def assign(self, ticket):
+        """Assign an unassigned ticket to the least loaded counselor; return the counselor id"""
+        from .models import OfflineSupportTicket
+
+        # The language may need a query; don't hold the lock for it
+        language = _ticket_language(ticket)
+        hours = ticket_hours(ticket)
+        with self._lock:
+            self._ensure_built()
+            load = self._choose(ticket.institution_id, language)
+            if load is None:
+                logger.warning('No active counselor for ticket %s', ticket.pk)
+                return None
+            self._adjust(load.counselor_id, 1, hours)
+            alert = load.overloaded and not load.alerted
+            load.alerted = load.alerted or alert
+
+        assigned = OfflineSupportTicket.objects.filter(
+            pk=ticket.pk, counselor__isnull=True, status__in=OPEN_STATUSES
+        ).update(counselor_id=load.counselor_id, updated_at=timezone.now())
+        if not assigned:
+            # Assigned by hand or closed in the meantime
+            with self._lock:
+                self._adjust(load.counselor_id, -1, -hours)
+            return None
+
+        ticket.counselor_id = load.counselor_id
+        ticket._routing_state = (load.counselor_id, True, hours)
+        if alert:
+            raise_overload_alert(load)
+        return load.counselor_id
+
+
+def _ticket_language(ticket):
+    language = (ticket.metadata or {}).get('language')
+    if language or ticket.created_by_id is None:
+        return language
+    from .models import UserProfile
+
+    return UserProfile.objects.filter(user_id=ticket.created_by_id).values_list(
+        'preferred_language__language_code', flat=True
+    ).first()
+
+
+def raise_overload_alert(load):
+    """Create an unresolved counselor_overload Alert unless one is already open"""
+    from admin_dashboard.models import Alert
+
+    title = f'Counselor overload: {load.name}'
+    if Alert.objects.filter(alert_type='counselor_overload', is_resolved=False, title=title).exists():
+        return
+    Alert.objects.create(
+        alert_type='counselor_overload',
+        severity='high',
+        title=title,
+        message=f'{load.name} has {load.open_tickets} open tickets and '
+                f'{load.scheduled_hours:g} hours scheduled this week.',
+        institution_id=load.institution_id,
+    )
+
+
+ticket_router = TicketRouter()
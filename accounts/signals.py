@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from booking_system.signals import slot_booked, slot_released
+
+from .models import Counselor, OfflineSupportTicket
+from .routing import OPEN_STATUSES, routing_setting, ticket_hours, ticket_router
+
+
+def _routing_state(ticket):
+    return ticket.counselor_id, ticket.status in OPEN_STATUSES, ticket_hours(ticket)
+
+
+@receiver(post_init, sender=OfflineSupportTicket)
+def remember_ticket_state(sender, instance, **kwargs):
+    instance._routing_state = _routing_state(instance)
+
+
+@receiver(post_save, sender=OfflineSupportTicket)
+def route_ticket(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = (None, False, 0.0) if created else instance._routing_state
+    new_counselor, new_open, _ = instance._routing_state = _routing_state(instance)
+    ticket_router.ticket_changed(old_state, instance._routing_state)
+
+    if created and new_counselor is None and new_open and routing_setting('AUTO_ASSIGN'):
+        transaction.on_commit(lambda: ticket_router.assign(instance))
+
+
+@receiver(post_delete, sender=OfflineSupportTicket)
+def release_ticket(sender, instance, **kwargs):
+    ticket_router.ticket_changed(instance._routing_state, (None, False, 0.0))
+
+
+@receiver(slot_booked)
+def slot_booked_hours(sender, slot, **kwargs):
+    ticket_router.slot_changed(slot, booked=True)
+
+
+@receiver(slot_released)
+def slot_released_hours(sender, slot, **kwargs):
+    ticket_router.slot_changed(slot, booked=False)
+
+
+@receiver([post_save, post_delete], sender=Counselor)
+def counselors_changed(sender, **kwargs):
+    ticket_router.invalidate()
+
+
+@receiver(m2m_changed, sender=Counselor.languages.through)
+def counselor_languages_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        ticket_router.invalidate()
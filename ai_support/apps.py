@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AiSupportConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_support'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,106 @@
+"""
+Conversation context for active chat sessions.
+
+The last ``CHAT_CONTEXT_TURNS`` turns and detected intents of each session are
+kept in the ``chat_context`` cache alias, keyed by ``ChatSession.session_id``.
+The alias is a size-bounded LRU with a TTL (LocMemCache locally; point it at a
+shared backend such as Redis to share context between workers). On a miss the
+context is rebuilt from the most recent ``ChatMessage`` rows.
+"""
+import threading
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+CACHE_ALIAS = 'chat_context'
+KEY_PREFIX = 'chat:ctx:'
+
+
+@dataclass
+class ConversationContext:
+    session_id: str
+    turns: list = field(default_factory=list)
+    intents: list = field(default_factory=list)
+
+    @property
+    def last_intent(self):
+        return self.intents[-1] if self.intents else None
+
+    def add_turn(self, user_message, bot_message, intent, max_turns):
+        self.turns.extend([('user', user_message), ('bot', bot_message)])
+        self.intents.append(intent)
+        # A turn is a user message plus the reply
+        del self.turns[:-max_turns * 2]
+        del self.intents[:-max_turns]
+
+
+class ContextStore:
+    """Read and write ConversationContext through the cache framework"""
+
+    def __init__(self, alias=CACHE_ALIAS, max_turns=10):
+        self.alias = alias
+        self.max_turns = max_turns
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        try:
+            return caches[self.alias]
+        except InvalidCacheBackendError:
+            return caches['default']
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, session_id, load=True):
+        """Return the context for ``session_id``; pass load=False for brand new sessions"""
+        data = self.cache.get(KEY_PREFIX + session_id)
+        self._count(data is not None)
+        if data is not None:
+            return ConversationContext(session_id, list(data['turns']), list(data['intents']))
+        if not load:
+            return ConversationContext(session_id)
+        return self._load(session_id)
+
+    def save(self, context):
+        self.cache.set(KEY_PREFIX + context.session_id, {
+            'turns': context.turns,
+            'intents': context.intents,
+        })
+
+    def record(self, context, user_message, bot_message, intent):
+        context.add_turn(user_message, bot_message, intent, self.max_turns)
+        self.save(context)
+
+    def _load(self, session_id):
+        """Rebuild a context from the database after a cache miss"""
+        from .models import ChatMessage
+
+        rows = list(
+            ChatMessage.objects.filter(session__session_id=session_id)
+            .order_by('-timestamp', '-pk')
+            .values_list('message_type', 'content')[:self.max_turns * 2]
+        )
+        # Intents are not stored with messages, so they start empty again
+        return ConversationContext(session_id, [tuple(row) for row in reversed(rows)])
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+
+context_store = ContextStore(max_turns=getattr(settings, 'CHAT_CONTEXT_TURNS', 10))
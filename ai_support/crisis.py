@@ -0,0 +1,219 @@
+"""
+Crisis language detection for chat messages and forum posts.
+
+``detect_crisis`` runs inline on the request path: every phrase in
+``ai_support/data/crisis.json`` (all languages, native and Roman script) is
+compiled at import into one regex, so a check is a single scan of the text.
+
+Raising the alarm happens off the request path. ``report_crisis`` puts an
+event on a queue that a background thread drains in batches: it creates one
+unresolved ``crisis`` Alert per conversation or post (skipping ones that
+already exist) and adds the batch size to today's
+``MentalHealthMetric.crisis_indicators`` with a single F() update. A batch
+that can't be recorded (e.g. the database is busy) goes back on the queue
+and is retried with exponential backoff; crisis events are never dropped.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .intents import compile_keywords, normalize
+
+logger = logging.getLogger(__name__)
+
+CRISIS_DATA_FILE = Path(__file__).resolve().parent / 'data' / 'crisis.json'
+CRISIS_INTENT = 'crisis'
+
+with open(CRISIS_DATA_FILE, encoding='utf-8') as fh:
+    _crisis_data = json.load(fh)
+
+_CRISIS_PATTERN = compile_keywords({
+    phrase for phrases in _crisis_data['phrases'].values() for phrase in phrases
+})
+CRISIS_RESPONSES = tuple(_crisis_data['responses'])
+
+
+def detect_crisis(text):
+    """Return the first crisis phrase found in ``text``, or None"""
+    found = _CRISIS_PATTERN.search(normalize(text))
+    return found.group(0) if found else None
+
+
+def crisis_response():
+    return random.choice(CRISIS_RESPONSES)
+
+
+@dataclass
+class CrisisEvent:
+    source: str
+    reference: str
+    phrase: str
+    user_id: int = None
+
+
+class CrisisAlertQueue:
+    """Turn crisis events into Alert rows and metric increments in batches"""
+
+    def __init__(self, batch_size=100, retry_delay=0.5, max_retry_delay=30.0, shutdown_retries=5):
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.shutdown_retries = shutdown_retries
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, event):
+        self._queue.put(event)
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='crisis-alerts', daemon=True)
+            self._thread.start()
+
+    def _drain(self, block=True):
+        events = []
+        try:
+            events.append(self._queue.get(block=block))
+            while len(events) < self.batch_size:
+                events.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def _requeue(self, events):
+        for event in events:
+            self._queue.put(event)
+
+    def _backoff(self, failures):
+        return min(self.retry_delay * 2 ** (failures - 1), self.max_retry_delay)
+
+    def _run(self):
+        failures = 0
+        while True:
+            events = self._drain()
+            try:
+                recorded = self.process(events)
+            finally:
+                connections.close_all()
+            if recorded:
+                failures = 0
+                continue
+            failures += 1
+            self._requeue(events)
+            time.sleep(self._backoff(failures))
+
+    def flush(self):
+        """Process everything still queued; used at shutdown"""
+        failures = 0
+        while True:
+            events = self._drain(block=False)
+            if not events:
+                return
+            if self.process(events):
+                failures = 0
+                continue
+            failures += 1
+            if failures > self.shutdown_retries:
+                logger.error('Shutting down with %d crisis events unrecorded', len(events) + self._queue.qsize())
+                return
+            self._requeue(events)
+            time.sleep(self._backoff(failures))
+
+    def process(self, events):
+        """Record a batch; return False if it could not be recorded and should be retried"""
+        from admin_dashboard.models import Alert
+
+        try:
+            # Read first, outside the transaction: on SQLite a transaction
+            # that reads and then writes fails at once with "database is
+            # locked" when another connection is writing, without waiting
+            # for the busy timeout. Starting with a write makes it wait.
+            alerts = self._new_alerts(events)
+            with transaction.atomic():
+                self._count(len(events))
+                Alert.objects.bulk_create(alerts)
+        except DatabaseError:
+            logger.warning('Failed to record %d crisis events; retrying', len(events), exc_info=True)
+            return False
+        return True
+
+    @staticmethod
+    def _title(event):
+        return f'Crisis language in {event.source} {event.reference}'
+
+    def _new_alerts(self, events):
+        """Unsaved Alerts for the events that don't have an unresolved one yet"""
+        from accounts.models import UserProfile
+        from admin_dashboard.models import Alert
+
+        by_title = {}
+        for event in events:
+            by_title.setdefault(self._title(event), event)
+        existing = set(
+            Alert.objects.filter(alert_type='crisis', is_resolved=False, title__in=by_title)
+            .values_list('title', flat=True)
+        )
+        new_events = {title: event for title, event in by_title.items() if title not in existing}
+        if not new_events:
+            return []
+
+        user_ids = {event.user_id for event in new_events.values() if event.user_id}
+        institutions = dict(
+            UserProfile.objects.filter(user_id__in=user_ids)
+            .values_list('user_id', 'institution_id')
+        )
+        return [
+            Alert(
+                alert_type='crisis',
+                severity='critical',
+                title=title,
+                message=f'Matched phrase "{event.phrase}" in {event.source} {event.reference}. '
+                        'Please follow up with the student as soon as possible.',
+                institution_id=institutions.get(event.user_id),
+            )
+            for title, event in new_events.items()
+        ]
+
+    @staticmethod
+    def _count(n):
+        from admin_dashboard.models import MentalHealthMetric
+
+        today = timezone.localdate()
+        updated = MentalHealthMetric.objects.filter(date=today).update(
+            crisis_indicators=F('crisis_indicators') + n
+        )
+        if not updated:
+            _, created = MentalHealthMetric.objects.get_or_create(
+                date=today, defaults={'crisis_indicators': n}
+            )
+            if not created:
+                # Another process created today's row first
+                MentalHealthMetric.objects.filter(date=today).update(
+                    crisis_indicators=F('crisis_indicators') + n
+                )
+
+
+crisis_queue = CrisisAlertQueue()
+atexit.register(crisis_queue.flush)
+
+
+def report_crisis(source, reference, phrase, user=None):
+    """Queue a crisis alert for ``source`` (e.g. 'chat session') and ``reference``"""
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    crisis_queue.put(CrisisEvent(source, str(reference), phrase, user_id))
@@ -0,0 +1,150 @@
+"""
+Pluggable reply generation for the AI support chat.
+
+The active backend is configured with ``CHAT_RESPONSE_GENERATOR`` in settings,
+in the same shape as ``CACHES``::
+
+    CHAT_RESPONSE_GENERATOR = {
+        'BACKEND': 'ai_support.generators.ProcessPoolResponseGenerator',
+        'OPTIONS': {'target': 'myapp.replies.generate', 'timeout': 2.0},
+    }
+
+Every backend receives the message and the session's ConversationContext (or
+None) and returns an ``(intent, response)`` tuple.
+"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .intents import get_active_matcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GENERATOR = {
+    'BACKEND': 'ai_support.generators.KeywordResponseGenerator',
+    'OPTIONS': {},
+}
+
+
+class ResponseGenerator:
+    """Base class for chat reply generators"""
+
+    def generate(self, message, context=None):
+        """Return ``(intent, response)`` for ``message``"""
+        raise NotImplementedError('subclasses of ResponseGenerator must provide a generate() method')
+
+    async def agenerate(self, message, context=None):
+        return await sync_to_async(self.generate, thread_sensitive=False)(message, context)
+
+
+class KeywordResponseGenerator(ResponseGenerator):
+    """Reply using the keyword intent matcher for the active language"""
+
+    def generate(self, message, context=None):
+        last_intent = context.last_intent if context is not None else None
+        return get_active_matcher().respond(message, default_intent=last_intent)
+
+    async def agenerate(self, message, context=None):
+        # Matching is a single regex scan; not worth a thread hop
+        return self.generate(message, context)
+
+
+def _init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mental_health_platform.settings')
+    import django
+    django.setup()
+
+
+def _call_target(target, message, history):
+    return import_string(target)(message, history)
+
+
+class ProcessPoolResponseGenerator(ResponseGenerator):
+    """
+    Run a CPU-heavy generator in a pool of worker processes.
+
+    ``target`` is the dotted path of a module-level callable taking the message
+    and the list of previous ``(message_type, content)`` turns and returning
+    ``(intent, response)``. At most ``max_pending`` generations may be queued
+    or running; further requests, and any request that doesn't finish within
+    ``timeout`` seconds, are answered by ``fallback`` instead.
+    """
+
+    def __init__(self, target, max_workers=None, max_pending=None, timeout=2.0, fallback=None):
+        self.target = target
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self.timeout = timeout
+        self.fallback = fallback or KeywordResponseGenerator()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, initializer=_init_worker
+                    )
+        return self._executor
+
+    def _submit(self, message, context):
+        """Queue a generation, or return None if the pool is saturated"""
+        if not self._slots.acquire(blocking=False):
+            return None
+        history = list(context.turns) if context is not None else []
+        try:
+            future = self._get_executor().submit(_call_target, self.target, message, history)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def generate(self, message, context=None):
+        future = self._submit(message, context)
+        if future is None:
+            logger.warning('Response generator pool saturated; using fallback')
+            return self.fallback.generate(message, context)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning('Response generation timed out after %ss; using fallback', self.timeout)
+        except Exception:
+            logger.exception('Response generation failed; using fallback')
+        return self.fallback.generate(message, context)
+
+    async def agenerate(self, message, context=None):
+        future = self._submit(message, context)
+        if future is None:
+            logger.warning('Response generator pool saturated; using fallback')
+            return await self.fallback.agenerate(message, context)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning('Response generation timed out after %ss; using fallback', self.timeout)
+        except Exception:
+            logger.exception('Response generation failed; using fallback')
+        return await self.fallback.agenerate(message, context)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache(maxsize=None)
+def get_generator():
+    """Return the configured response generator"""
+    config = getattr(settings, 'CHAT_RESPONSE_GENERATOR', DEFAULT_GENERATOR)
+    backend = import_string(config['BACKEND'])
+    return backend(**config.get('OPTIONS', {}))
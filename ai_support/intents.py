@@ -0,0 +1,181 @@
+"""
+Keyword intent matching for the AI support chat.
+
+Intent packs live in ``ai_support/data/intents/<language>.json``, named after
+the codes in ``settings.LANGUAGES``. ``en.json`` is the base pack; a language
+pack adds native and Roman-script keywords to the base intents and replaces
+their responses. The merged pack is compiled once into a single alternation
+regex, so a message is scanned in one pass no matter how many intents or
+keywords it defines. Packs are only loaded the first time their language is
+requested.
+"""
+import json
+import random
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from django.utils import translation
+
+INTENT_DATA_DIR = Path(__file__).resolve().parent / 'data' / 'intents'
+DEFAULT_LANGUAGE = 'en'
+FALLBACK_INTENT = 'general'
+
+# Python's \b treats Indic vowel signs as non-word characters and would split
+# words like "आत्महत्या", so word boundaries are spelled out with this class
+_WORD_CHARS = r'\w\u0900-\u0DFF'
+
+
+# Mobile keyboards type typographic apostrophes; keywords use the ASCII one
+_APOSTROPHES = str.maketrans({'\u2019': "'", '\u2018': "'", '\u02bc': "'"})
+
+
+def normalize(text):
+    """NFC-normalize text so precomposed and combining nukta forms match, and fold apostrophes"""
+    return unicodedata.normalize('NFC', text).translate(_APOSTROPHES)
+
+
+def compile_keywords(keywords):
+    """Compile keywords into one case-insensitive, word-bounded alternation"""
+    keywords = {normalize(keyword) for keyword in keywords}
+    # Longest first so "exams" is preferred over "exam" at the same offset
+    alternation = '|'.join(
+        re.escape(keyword).replace(r'\ ', r'\s+')
+        for keyword in sorted(keywords, key=len, reverse=True)
+    )
+    return re.compile(
+        rf'(?<![{_WORD_CHARS}])(?:{alternation})(?![{_WORD_CHARS}])', re.IGNORECASE
+    )
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    priority: int
+    keywords: tuple
+    responses: tuple
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    intent: Intent
+    keyword: str
+    position: int
+
+
+class IntentMatcher:
+    """Match chat messages against a set of keyword intents in a single pass"""
+
+    def __init__(self, intents, fallback_responses):
+        self.intents = sorted(intents, key=lambda intent: -intent.priority)
+        self.fallback_responses = tuple(fallback_responses)
+        self._keyword_map = {}
+        for intent in self.intents:
+            for keyword in intent.keywords:
+                # Higher priority intents win when two intents share a keyword
+                self._keyword_map.setdefault(normalize(keyword).casefold(), intent)
+        self._pattern = compile_keywords(self._keyword_map) if self._keyword_map else None
+
+    @classmethod
+    def from_data(cls, data):
+        intents = [
+            Intent(
+                name=item['name'],
+                priority=item.get('priority', 0),
+                keywords=tuple(item.get('keywords', [])),
+                responses=tuple(item.get('responses', [])),
+            )
+            for item in data.get('intents', [])
+        ]
+        return cls(intents, data.get('fallback', []))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as fh:
+            return cls.from_data(json.load(fh))
+
+    def match(self, message):
+        """Return one IntentMatch per intent hit, highest priority first"""
+        if self._pattern is None:
+            return []
+        hits = {}
+        for found in self._pattern.finditer(normalize(message)):
+            keyword = ' '.join(found.group(0).split()).casefold()
+            intent = self._keyword_map.get(keyword)
+            if intent is not None and intent.name not in hits:
+                hits[intent.name] = IntentMatch(intent, keyword, found.start())
+        return sorted(hits.values(), key=lambda hit: (-hit.intent.priority, hit.position))
+
+    def get_intent(self, name):
+        for intent in self.intents:
+            if intent.name == name:
+                return intent
+        return None
+
+    def respond(self, message, default_intent=None):
+        """
+        Return ``(intent_name, response)`` for the best matching intent.
+
+        ``default_intent`` names the intent to stay on when the message
+        matches nothing, e.g. the intent of the previous turn.
+        """
+        for hit in self.match(message):
+            if hit.intent.responses:
+                return hit.intent.name, random.choice(hit.intent.responses)
+        intent = self.get_intent(default_intent) if default_intent else None
+        if intent is not None and intent.responses:
+            return intent.name, random.choice(intent.responses)
+        return FALLBACK_INTENT, random.choice(self.fallback_responses)
+
+
+def _load_pack(language):
+    with open(INTENT_DATA_DIR / f'{language}.json', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def merge_packs(base, pack):
+    """Overlay a language pack on the base pack"""
+    intents = {item['name']: dict(item) for item in base.get('intents', [])}
+    for item in pack.get('intents', []):
+        merged = intents.setdefault(item['name'], {'name': item['name']})
+        merged['keywords'] = list(merged.get('keywords', [])) + list(item.get('keywords', []))
+        merged['responses'] = item.get('responses') or merged.get('responses', [])
+        if 'priority' in item:
+            merged['priority'] = item['priority']
+    return {
+        'language': pack.get('language'),
+        'fallback': pack.get('fallback') or base.get('fallback', []),
+        'intents': list(intents.values()),
+    }
+
+
+@lru_cache(maxsize=None)
+def has_pack(language):
+    return (INTENT_DATA_DIR / f'{language}.json').is_file()
+
+
+@lru_cache(maxsize=None)
+def _build_matcher(language):
+    data = _load_pack(DEFAULT_LANGUAGE)
+    if language != DEFAULT_LANGUAGE:
+        data = merge_packs(data, _load_pack(language))
+    return IntentMatcher.from_data(data)
+
+
+def get_matcher(language=DEFAULT_LANGUAGE):
+    """Return the compiled matcher for ``language``, falling back to the base pack"""
+    language = (language or DEFAULT_LANGUAGE).split('-')[0].lower()
+    if not has_pack(language):
+        language = DEFAULT_LANGUAGE
+    return _build_matcher(language)
+
+
+def get_active_matcher():
+    """Return the matcher for the language activated by LocaleMiddleware"""
+    return get_matcher(translation.get_language())
+
+
+# Compile the default pack at import so the first chat request doesn't pay for it
+get_matcher()
@@ -0,0 +1,129 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from ai_support.models import ChatMessage, ChatSession
+
+
+class Command(BaseCommand):
+    help = 'Archive chat sessions with no activity for a given number of days to gzipped JSONL files and delete them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Archive sessions not updated in this many days (default: 90)',
+        )
+        parser.add_argument(
+            '--output-dir',
+            default=str(Path(settings.BASE_DIR) / 'archives' / 'chat'),
+            help='Directory for the monthly archive files',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Sessions archived and deleted per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Write the archive without deleting archived rows',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many sessions would be archived',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        sessions = ChatSession.objects.filter(updated_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'{sessions.count()} chat sessions older than {cutoff:%Y-%m-%d} would be archived')
+            return
+
+        output_dir = Path(options['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.files = {}
+        self.output_dir = output_dir
+
+        archived_sessions = archived_messages = 0
+        try:
+            last_pk = 0
+            while True:
+                # Keyset batches: no cursor stays open on rows we are deleting
+                chunk = list(
+                    sessions.filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', 'session_id', 'user_id')[:options['chunk_size']]
+                )
+                if not chunk:
+                    break
+                last_pk = chunk[-1][0]
+                archived_messages += self.archive_chunk(chunk, cutoff, options['keep'])
+                archived_sessions += len(chunk)
+        finally:
+            for fh in self.files.values():
+                fh.close()
+
+        action = 'Archived' if options['keep'] else 'Archived and deleted'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {action} {archived_sessions} sessions ({archived_messages} messages) into {output_dir}'
+            )
+        )
+
+    def archive_file(self, timestamp):
+        month = timezone.localtime(timestamp).strftime('%Y-%m')
+        if month not in self.files:
+            # Append mode adds a new gzip member, so reruns extend the month's file
+            self.files[month] = gzip.open(self.output_dir / f'chat-{month}.jsonl.gz', 'at', encoding='utf-8')
+        return self.files[month]
+
+    def archive_chunk(self, chunk, cutoff, keep):
+        """Write the messages of one batch of sessions, then delete the batch"""
+        sessions = {pk: (session_id, user_id) for pk, session_id, user_id in chunk}
+        messages = (
+            ChatMessage.objects.filter(session_id__in=sessions)
+            .order_by('session_id', 'timestamp', 'pk')
+            .values_list('session_id', 'message_type', 'content', 'timestamp')
+            .iterator(chunk_size=2000)
+        )
+        count = 0
+        for session_pk, message_type, content, timestamp in messages:
+            session_id, user_id = sessions[session_pk]
+            self.archive_file(timestamp).write(json.dumps({
+                'session_id': session_id,
+                'user_id': user_id,
+                'message_type': message_type,
+                'content': content,
+                'timestamp': timestamp.isoformat(),
+            }, ensure_ascii=False) + '\n')
+            count += 1
+
+        # Make sure the batch is on disk before its rows go away
+        for fh in self.files.values():
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        if not keep:
+            with transaction.atomic():
+                # Skip sessions that received new messages while we were writing
+                still_old = list(
+                    ChatSession.objects.filter(pk__in=sessions, updated_at__lt=cutoff)
+                    .values_list('pk', flat=True)
+                )
+                ChatMessage.objects.filter(session_id__in=still_old).delete()
+                ChatSession.objects.filter(pk__in=still_old).delete()
+        return count
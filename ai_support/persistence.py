@@ -0,0 +1,134 @@
+"""
+Buffered persistence of chat turns.
+
+``send_message`` appends turns to an in-process buffer instead of writing to
+the database on the request path. A background thread flushes the buffer with
+``bulk_create`` whenever it reaches ``CHAT_BUFFER_MAX_SIZE`` messages or every
+``CHAT_BUFFER_FLUSH_INTERVAL`` seconds, and once more when the process exits.
+
+Under ``manage.py test`` (``settings.TESTING``) every turn is written
+straight away: the exit flush would run after the test database has been
+destroyed and write to the configured database instead.
+"""
+import atexit
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingMessage:
+    session_id: str
+    message_type: str
+    content: str
+    user_id: int = None
+    timestamp: datetime = field(default_factory=timezone.now)
+
+
+class ChatMessageBuffer:
+    """Collect chat messages in memory and write them in batches"""
+
+    def __init__(self, max_size=50, flush_interval=2.0):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def append(self, session_id, message_type, content, user_id=None):
+        message = PendingMessage(session_id, message_type, content, user_id)
+        with self._lock:
+            self._pending.append(message)
+            full = len(self._pending) >= self.max_size
+        if getattr(settings, 'TESTING', False):
+            self.flush()
+            return
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Write every pending message; return how many were written"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        try:
+            self._write(pending)
+        except DatabaseError:
+            logger.exception('Dropping %d chat messages after failed flush', len(pending))
+            return 0
+        return len(pending)
+
+    @staticmethod
+    def _write(pending):
+        from .models import ChatMessage, ChatSession
+
+        owners = {}
+        for message in pending:
+            owners.setdefault(message.session_id, message.user_id)
+
+        with transaction.atomic():
+            ChatSession.objects.bulk_create(
+                [ChatSession(session_id=sid, user_id=uid) for sid, uid in owners.items()],
+                ignore_conflicts=True,
+            )
+            session_pks = dict(
+                ChatSession.objects.filter(session_id__in=owners).values_list('session_id', 'pk')
+            )
+            ChatMessage.objects.bulk_create([
+                ChatMessage(
+                    session_id=session_pks[message.session_id],
+                    message_type=message.message_type,
+                    content=message.content,
+                    timestamp=message.timestamp,
+                )
+                for message in pending
+            ])
+            ChatSession.objects.filter(pk__in=session_pks.values()).update(updated_at=timezone.now())
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='chat-message-flusher', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # This thread owns its own connections; don't leave them open
+                connections.close_all()
+
+
+chat_buffer = ChatMessageBuffer(
+    max_size=getattr(settings, 'CHAT_BUFFER_MAX_SIZE', 50),
+    flush_interval=getattr(settings, 'CHAT_BUFFER_FLUSH_INTERVAL', 2.0),
+)
+atexit.register(chat_buffer.flush)
+
+
+def record_turn(session_id, user_message, bot_message, user=None):
+    """Queue a user message and the bot reply for persistence"""
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    chat_buffer.append(session_id, 'user', user_message, user_id)
+    chat_buffer.append(session_id, 'bot', bot_message, user_id)
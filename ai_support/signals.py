@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CopingStrategy
+from .strategies import strategy_index
+
+
+@receiver([post_save, post_delete], sender=CopingStrategy)
+def invalidate_strategy_index(sender, **kwargs):
+    strategy_index.invalidate()
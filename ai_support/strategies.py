@@ -0,0 +1,77 @@
+"""
+In-memory index of coping strategies for the chat bot.
+
+The index maps ``(category, language)`` to strategies ordered newest first and
+is built with one query the first time it is used. Saving or deleting a
+CopingStrategy bumps a version number in the default cache; every process
+compares its copy against that version and rebuilds when it is out of date, so
+lookups never touch the database while the data is unchanged.
+"""
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .intents import DEFAULT_LANGUAGE
+
+VERSION_KEY = 'ai_support:coping_index:version'
+
+
+def _key(value):
+    return (value or '').strip().casefold()
+
+
+class StrategyIndex:
+    """Lookup table of coping strategies by category and language"""
+
+    def __init__(self):
+        self._entries = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_version():
+        return cache.get_or_set(VERSION_KEY, 1, timeout=None)
+
+    @staticmethod
+    def invalidate():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, timeout=None)
+
+    def _build(self):
+        from .models import CopingStrategy
+
+        entries = defaultdict(list)
+        rows = CopingStrategy.objects.order_by('-created_at', '-pk').values(
+            'id', 'title', 'description', 'category', 'language'
+        )
+        for row in rows:
+            entries[(_key(row['category']), _key(row['language']))].append(row)
+        return {key: tuple(value) for key, value in entries.items()}
+
+    def _get_entries(self):
+        version = self.current_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._entries = self._build()
+                    self._version = version
+        return self._entries
+
+    def lookup(self, category, language=DEFAULT_LANGUAGE, limit=3):
+        """Return up to ``limit`` strategies, falling back to the default language"""
+        entries = self._get_entries()
+        category = _key(category)
+        language = _key(language).split('-')[0]
+        results = entries.get((category, language), ())
+        if not results and language != DEFAULT_LANGUAGE:
+            results = entries.get((category, DEFAULT_LANGUAGE), ())
+        return list(results[:limit])
+
+    def categories(self):
+        return sorted({category for category, _ in self._get_entries()})
+
+
+strategy_index = StrategyIndex()
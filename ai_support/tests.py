@@ -1,3 +1,30 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from .crisis import detect_crisis
+from .models import ChatMessage
+from .persistence import chat_buffer, record_turn
+
+
+class CrisisDetectionTests(SimpleTestCase):
+
+    def test_typographic_apostrophes_match(self):
+        for text in ("I don't want to live", 'I don’t want to live',
+                     'I don‘t want to live', 'I donʼt want to live'):
+            self.assertEqual(detect_crisis(text), "don't want to live", text)
+
+    def test_no_crisis(self):
+        self.assertIsNone(detect_crisis('I don’t want to study today'))
+
+
+class ChatPersistenceTests(TestCase):
+
+    def test_turns_are_written_straight_away_under_tests(self):
+        # Nothing may be left for the exit flush, which runs after the test
+        # database is gone
+        record_turn('session-1', 'hello', 'Hi, how are you feeling today?')
+        self.assertEqual(len(chat_buffer), 0)
+        self.assertEqual(
+            list(ChatMessage.objects.filter(session__session_id='session-1')
+                 .order_by('pk').values_list('message_type', flat=True)),
+            ['user', 'bot'],
+        )
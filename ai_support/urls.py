@@ -4,5 +4,7 @@ from . import views
 urlpatterns = [
     path('', views.chat_home, name='chat'),
     path('api/send-message/', views.send_message, name='send_message'),
+    path('api/stream-message/', views.stream_message, name='stream_message'),
     path('coping-strategies/', views.coping_strategies, name='coping_strategies'),
+    path('api/coping-strategies/', views.coping_strategies_api, name='coping_strategies_api'),
 ]
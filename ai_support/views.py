@@ -1,13 +1,50 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.utils import translation
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
 import json
+import re
+import uuid
+
+from mental_health_platform.ratelimit import ratelimit
+
+from .context import context_store
+from .crisis import CRISIS_INTENT, crisis_response, detect_crisis, report_crisis
+from .generators import get_generator
+from .strategies import strategy_index
+from .persistence import record_turn
+
+def _chat_session_id(request):
+    """Return ``(session_id, created)`` for this browser session's ChatSession"""
+    session_id = request.session.get('chat_session_id')
+    if session_id:
+        return session_id, False
+    session_id = uuid.uuid4().hex
+    request.session['chat_session_id'] = session_id
+    return session_id, True
+
+def _crisis_reply(message, session_id, user):
+    """Return a crisis ``(intent, response)`` and raise an alert if ``message`` needs one"""
+    phrase = detect_crisis(message)
+    if phrase is None:
+        return None
+    report_crisis('chat session', session_id, phrase, user)
+    return CRISIS_INTENT, crisis_response()
+
+def _strategies_for(intent, limit=3):
+    """Coping strategies to attach to a reply for ``intent``"""
+    return [
+        {'id': s['id'], 'title': s['title'], 'description': s['description']}
+        for s in strategy_index.lookup(intent, translation.get_language(), limit)
+    ]
 
 def chat_home(request):
     """AI Chat interface"""
     return render(request, 'ai_support/chat.html')
 
 @csrf_exempt
+@ratelimit('chat', rate='20/m')
 def send_message(request):
     """Handle chat messages (API endpoint)"""
     if request.method == 'POST':
@@ -21,60 +58,20 @@ def send_message(request):
                     'status': 'error'
                 })
             
-            # Enhanced response logic based on keywords
-            message_lower = message.lower()
-            
-            if any(word in message_lower for word in ['anxious', 'anxiety', 'worried', 'stress']):
-                responses = [
-                    "I hear that you're feeling anxious. Anxiety is very common among students. Try taking slow, deep breaths. Would you like some specific breathing exercises?",
-                    "Stress and anxiety can be overwhelming. Have you tried any grounding techniques? One simple method is the 5-4-3-2-1 technique: name 5 things you can see, 4 you can touch, 3 you can hear, 2 you can smell, and 1 you can taste.",
-                    "It sounds like you're dealing with anxiety. This is completely normal. Consider speaking with a counselor who can provide personalized strategies. Would you like me to help you schedule an appointment?"
-                ]
-            elif any(word in message_lower for word in ['sad', 'depressed', 'down', 'hopeless']):
-                responses = [
-                    "I'm sorry you're feeling this way. Depression can make everything feel difficult. You're taking a positive step by reaching out. Have you considered talking to a professional?",
-                    "Feeling down is something many students experience. It's important to know that you're not alone and that help is available. Would you like information about counseling services?",
-                    "Thank you for sharing how you're feeling. These feelings are valid, and there are ways to feel better. Sometimes talking to someone can make a big difference."
-                ]
-            elif any(word in message_lower for word in ['exam', 'test', 'study', 'academic']):
-                responses = [
-                    "Academic pressure can be really challenging. Try breaking your study into smaller, manageable chunks. What specific part of your studies is causing you the most stress?",
-                    "Exam stress is very common! Some strategies that help: create a study schedule, take regular breaks, get enough sleep, and practice relaxation techniques. Would you like more specific study tips?",
-                    "Academic challenges can feel overwhelming. Remember that it's okay to ask for help - from professors, tutors, or counselors. What subject or assignment is troubling you most?"
-                ]
-            elif any(word in message_lower for word in ['sleep', 'tired', 'insomnia', 'exhausted']):
-                responses = [
-                    "Sleep problems can really affect your mental health and academic performance. Try maintaining a regular sleep schedule and avoiding screens before bed. Are you having trouble falling asleep or staying asleep?",
-                    "Good sleep is crucial for mental health. Some tips: keep your room cool and dark, avoid caffeine late in the day, and try relaxation exercises before bed. How long have you been having sleep issues?",
-                    "Sleep difficulties are common among students. Consider creating a bedtime routine and avoiding studying in bed. If this continues, it might be worth speaking with a healthcare provider."
-                ]
-            elif any(word in message_lower for word in ['lonely', 'alone', 'isolated', 'friends']):
-                responses = [
-                    "Feeling lonely can be really hard, especially as a student. Have you considered joining clubs or study groups? Our peer support forum might also be a good place to connect with others.",
-                    "Social connections are important for mental health. It can be challenging to make friends, but there are opportunities on campus. Would you like suggestions for meeting like-minded people?",
-                    "You're not alone in feeling lonely. Many students struggle with this. Consider attending campus events or joining our peer support community where you can connect with others who understand."
-                ]
-            elif any(word in message_lower for word in ['help', 'support', 'counselor', 'therapy']):
-                responses = [
-                    "I'm glad you're seeking help - that takes courage. Our counseling center offers confidential support. Would you like me to provide information about booking an appointment?",
-                    "Reaching out for support is a sign of strength. We have professional counselors available, as well as peer support options. What type of help would be most useful for you right now?",
-                    "There are several support options available: individual counseling, group therapy, peer support forums, and crisis hotlines. What feels most comfortable for you to try first?"
-                ]
-            else:
-                # General supportive responses
-                responses = [
-                    "Thank you for sharing with me. Can you tell me more about what's on your mind?",
-                    "I'm here to listen. What's been troubling you lately?",
-                    "It sounds like you have something important to share. I'm here to support you.",
-                    "Everyone goes through difficult times. What would be most helpful for you right now?",
-                    "I appreciate you reaching out. What's the main thing you'd like support with today?"
-                ]
-            
-            import random
-            bot_response = random.choice(responses)
+            session_id, created = _chat_session_id(request)
+            context = context_store.get(session_id, load=not created)
+            intent, bot_response = (
+                _crisis_reply(message, session_id, request.user)
+                or get_generator().generate(message, context)
+            )
+            context_store.record(context, message, bot_response, intent)
+            record_turn(session_id, message, bot_response, request.user)
             
             return JsonResponse({
                 'response': bot_response,
+                'intent': intent,
+                'strategies': _strategies_for(intent),
+                'session_id': session_id,
                 'status': 'success'
             })
             
@@ -91,6 +88,83 @@ def send_message(request):
     
     return JsonResponse({'error': 'Invalid request method', 'status': 'error'})
 
+_TOKEN_RE = re.compile(r'\S+\s*')
+
+def _sse(event, payload):
+    """Format one server-sent event"""
+    return f'event: {event}\ndata: {json.dumps(payload)}\n\n'
+
+@csrf_exempt
+@ratelimit('chat', rate='20/m')
+async def stream_message(request):
+    """Handle chat messages, streaming the reply as server-sent events (ASGI endpoint)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method', 'status': 'error'})
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'error': 'Invalid message format',
+            'status': 'error'
+        })
+    
+    message = data.get('message', '').strip()
+    if not message:
+        return JsonResponse({
+            'error': 'Please enter a message',
+            'status': 'error'
+        })
+    
+    user = await request.auser()
+    session_id, created = await sync_to_async(_chat_session_id)(request)
+    
+    async def events():
+        # Send the session id before generating so the first byte goes out immediately
+        yield _sse('start', {'session_id': session_id})
+        context = await sync_to_async(context_store.get)(session_id, load=not created)
+        crisis = _crisis_reply(message, session_id, user)
+        if crisis is not None:
+            intent, bot_response = crisis
+        else:
+            intent, bot_response = await get_generator().agenerate(message, context)
+        strategies = await sync_to_async(_strategies_for)(intent)
+        yield _sse('intent', {'intent': intent, 'strategies': strategies})
+        for token in _TOKEN_RE.findall(bot_response):
+            yield _sse('token', {'token': token})
+        await sync_to_async(context_store.record)(context, message, bot_response, intent)
+        record_turn(session_id, message, bot_response, user)
+        yield _sse('done', {'status': 'success'})
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 def coping_strategies(request):
     """List of coping strategies"""
     return render(request, 'ai_support/coping_strategies.html')
+
+def coping_strategies_api(request):
+    """Coping strategies for a category in the active language (API endpoint)"""
+    category = request.GET.get('category', '').strip()
+    if not category:
+        return JsonResponse({
+            'categories': strategy_index.categories(),
+            'status': 'success'
+        })
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 3)), 1), 20)
+    except ValueError:
+        limit = 3
+    language = request.GET.get('language') or translation.get_language()
+    
+    return JsonResponse({
+        'category': category,
+        'strategies': [
+            {'id': s['id'], 'title': s['title'], 'description': s['description'], 'language': s['language']}
+            for s in strategy_index.lookup(category, language, limit)
+        ],
+        'status': 'success'
+    })
@@ -1,9 +1,17 @@
 from django.contrib import admin
-from .models import Counselor, Appointment, AvailableSlot
+from .models import Counselor, CounselorLanguage, Appointment, AvailableSlot, WaitlistEntry
+
+
+class CounselorLanguageInline(admin.TabularInline):
+    model = CounselorLanguage
+    extra = 0
+    readonly_fields = ['code']
+    can_delete = False
 
 
 @admin.register(Counselor)
 class BookingCounselorAdmin(admin.ModelAdmin):
+    inlines = [CounselorLanguageInline]
     list_display = ['user', 'specialization', 'languages', 'is_available']
     list_filter = ['is_available', 'specialization']
     search_fields = ['user__username', 'user__first_name', 'user__last_name', 'specialization']
@@ -54,4 +62,15 @@ class AvailableSlotAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.select_related('counselor__user')
-# Register your models here.
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'counselor', 'date', 'priority', 'status', 'created_at']
+    list_filter = ['status', 'priority', 'date']
+    search_fields = ['student__username', 'counselor__user__username']
+    list_editable = ['priority']
+    date_hierarchy = 'date'
+    raw_id_fields = ['student', 'appointment']
+    readonly_fields = ['created_at', 'updated_at']
+
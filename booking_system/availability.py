@@ -0,0 +1,238 @@
+"""
+In-memory index of free appointment slots.
+
+Free slots from today onwards are held per counselor and mode (online or in
+person) in a list sorted by start time, so a date-range search is a binary search per matching counselor and the
+"next N slots" are a lazy k-way merge of those lists. Counselor attributes used
+for filtering (languages, specialization, institution) are kept alongside.
+
+Every booking, cancellation or slot edit appends an entry to a change log in
+the default cache (a sequence number plus one key per change). Each process
+checks the sequence number before searching and replays the entries it has not
+seen; if an entry has expired, or a full reset was published, it rebuilds the
+index from the database instead.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import date as date_cls, datetime, timedelta
+from itertools import islice
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .directory import counselor_directory, language_code
+
+SEQ_KEY = 'booking:slots:seq'
+CHANGE_KEY = 'booking:slots:change:{}'
+CHANGE_TTL = 60 * 60
+RESET = 'reset'
+
+
+def publish(*changes):
+    """Append changes to the shared log; each is RESET or a slot tuple with a free flag"""
+    if not changes:
+        return
+    try:
+        last = cache.incr(SEQ_KEY, len(changes))
+    except ValueError:
+        cache.add(SEQ_KEY, 0, timeout=None)
+        last = cache.incr(SEQ_KEY, len(changes))
+    first = last - len(changes) + 1
+    cache.set_many(
+        {CHANGE_KEY.format(first + i): change for i, change in enumerate(changes)},
+        timeout=CHANGE_TTL,
+    )
+
+
+def slot_change(slot, free):
+    return (slot.pk, slot.counselor_id, slot.date, slot.start_time, slot.end_time, free)
+
+
+def _is_online(online_rules, counselor_id, day, start):
+    for weekday, rule_start, rule_end, is_online in online_rules.get(counselor_id, ()):
+        if weekday == day.weekday() and rule_start <= start < rule_end:
+            return is_online
+    return False
+
+
+class AvailabilityIndex:
+    """Free slots per counselor, kept in sync through the cache change log"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = None
+        self.counselors = {}
+        self.slots = {}
+        # Slot id -> (slots key, entry), to find a slot again when it changes
+        self._entries = {}
+        self._online_rules = {}
+
+    # Building and syncing
+
+    def _build(self):
+        from accounts.models import CounselorAvailability
+
+        from .models import AvailableSlot
+
+        counselors = {}
+        users = {}
+        for entry in counselor_directory():
+            users[entry['user_id']] = entry['id']
+            institution = entry['institution'] or {}
+            counselors[entry['id']] = {
+                'id': entry['id'],
+                'name': entry['name'],
+                'specialization': entry['specialization'],
+                'languages': set(entry['languages']),
+                'is_available': entry['is_available'],
+                'institution_id': institution.get('id'),
+                'institution_code': institution.get('code'),
+            }
+
+        online_rules = defaultdict(list)
+        for user_id, weekday, start, end, is_online in CounselorAvailability.objects.values_list(
+            'counselor__user_id', 'weekday', 'start_time', 'end_time', 'is_online'
+        ):
+            if user_id in users:
+                online_rules[users[user_id]].append((weekday, start, end, is_online))
+
+        slots = defaultdict(list)
+        positions = {}
+        rows = AvailableSlot.objects.filter(
+            is_booked=False, date__gte=timezone.localdate()
+        ).values_list('pk', 'counselor_id', 'date', 'start_time', 'end_time')
+        for pk, counselor_id, day, start, end in rows:
+            key = (counselor_id, _is_online(online_rules, counselor_id, day, start))
+            entry = (datetime.combine(day, start), pk, end)
+            slots[key].append(entry)
+            positions[pk] = (key, entry)
+        for entries in slots.values():
+            entries.sort()
+
+        # Searches run without the lock, so they must never see a half-built index
+        self.counselors, self._online_rules, self.slots, self._entries = (
+            counselors, online_rules, dict(slots), positions
+        )
+
+    def _apply(self, change):
+        # Lists are replaced rather than changed in place, so searches running
+        # without the lock keep iterating a consistent copy
+        pk, counselor_id, day, start, end, free = change
+        previous = self._entries.pop(pk, None)
+        if previous is not None:
+            # Removed wherever it was, so edits to its date or time move it
+            key, entry = previous
+            entries = list(self.slots.get(key, ()))
+            position = bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+                self.slots[key] = entries
+        if free:
+            key = (counselor_id, _is_online(self._online_rules, counselor_id, day, start))
+            entry = (datetime.combine(day, start), pk, end)
+            entries = list(self.slots.get(key, ()))
+            insort(entries, entry)
+            self.slots[key] = entries
+            self._entries[pk] = (key, entry)
+
+    def sync(self):
+        """Bring the index up to date with the shared change log"""
+        seq = cache.get_or_set(SEQ_KEY, 0, timeout=None)
+        if seq == self._seq:
+            return
+        with self._lock:
+            if seq == self._seq:
+                return
+            if self._seq is None or seq < self._seq:
+                self._build()
+                self._seq = seq
+                return
+            keys = [CHANGE_KEY.format(n) for n in range(self._seq + 1, seq + 1)]
+            changes = cache.get_many(keys)
+            if len(changes) != len(keys) or RESET in changes.values():
+                self._build()
+            else:
+                for key in keys:
+                    self._apply(changes[key])
+            self._seq = seq
+
+    @property
+    def version(self):
+        """Sequence number of the last change applied; changes whenever any slot does"""
+        return self._seq
+
+    def snapshot(self, days):
+        """Return free slots of the next ``days`` days as ``{counselor_id: [[slot_id, date, time, online], ...]}``"""
+        self.sync()
+        now = timezone.localtime().replace(tzinfo=None)
+        end = datetime.combine(now.date() + timedelta(days=days), datetime.min.time())
+        result = defaultdict(list)
+        for (counselor_id, is_online), entries in list(self.slots.items()):
+            info = self.counselors.get(counselor_id)
+            if not entries or info is None or not info['is_available']:
+                continue
+            for starts_at, pk, _ in islice(entries, bisect_left(entries, (now,)), None):
+                if starts_at >= end:
+                    break
+                result[counselor_id].append([pk, starts_at.date().isoformat(), starts_at.strftime('%H:%M'), is_online])
+        for slots in result.values():
+            slots.sort(key=lambda slot: (slot[1], slot[2]))
+        return dict(result)
+
+    # Searching
+
+    def _matches(self, info, language, specialization, institution):
+        if not info['is_available']:
+            return False
+        if language and language not in info['languages']:
+            return False
+        if specialization and specialization not in info['specialization'].casefold():
+            return False
+        if institution and institution not in (str(info['institution_id']), (info['institution_code'] or '').casefold()):
+            return False
+        return True
+
+    def search(self, start=None, end=None, language=None, specialization=None,
+               institution=None, online=None, limit=10):
+        """Return up to ``limit`` free slots ordered by start time"""
+        self.sync()
+        now = timezone.localtime().replace(tzinfo=None)
+        start = max(start or now, now)
+        end = end or datetime.combine(date_cls.max, datetime.min.time())
+        language = language_code(language) if language else None
+        specialization = specialization.casefold() if specialization else None
+        institution = institution.casefold() if institution else None
+
+        def counselor_slots(counselor_id, is_online, entries):
+            for entry in islice(entries, bisect_left(entries, (start,)), None):
+                if entry[0] >= end:
+                    return
+                yield entry + (is_online, counselor_id)
+
+        streams = [
+            counselor_slots(counselor_id, is_online, entries)
+            for (counselor_id, is_online), entries in list(self.slots.items())
+            if entries
+            and (online is None or is_online == online)
+            and self._matches(self.counselors.get(counselor_id, {'is_available': False}),
+                              language, specialization, institution)
+        ]
+        results = []
+        for starts_at, pk, ends_at, is_online, counselor_id in islice(heapq.merge(*streams), limit):
+            info = self.counselors[counselor_id]
+            results.append({
+                'slot_id': pk,
+                'counselor_id': counselor_id,
+                'counselor_name': info['name'],
+                'specialization': info['specialization'],
+                'date': starts_at.date().isoformat(),
+                'start_time': starts_at.strftime('%H:%M'),
+                'end_time': ends_at.strftime('%H:%M'),
+                'is_online': is_online,
+            })
+        return results
+
+
+availability_index = AvailabilityIndex()
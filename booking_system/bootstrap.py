@@ -0,0 +1,75 @@
+"""
+Data for the booking page in one compact payload.
+
+The part shared by all users (counselors and free slots) only changes when
+the availability change log does (booking_system.availability), so it is
+serialized once per log sequence number and kept in the default cache.
+Counselor changes publish a reset to the same log, so the sequence number
+covers them too. Only the user's own appointments are read per request.
+"""
+import json
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .availability import availability_index
+from .directory import counselor_directory
+from .models import Appointment
+
+PAYLOAD_KEY = 'booking:bootstrap:{version}:{days}'
+PAYLOAD_TTL = 10 * 60
+# Upcoming appointments listed for the user
+APPOINTMENT_LIMIT = 50
+
+
+def _compact(data):
+    return json.dumps(data, separators=(',', ':'))
+
+
+def shared_payload(days):
+    """Return ``(version, json)`` of the counselors and free slots of the next ``days`` days"""
+    availability_index.sync()
+    version = availability_index.version
+    key = PAYLOAD_KEY.format(version=version, days=days)
+    payload = cache.get(key)
+    if payload is None:
+        slots = availability_index.snapshot(days)
+        counselors = [
+            [entry['id'], entry['name'], entry['specialization'], entry['languages'],
+             (entry['institution'] or {}).get('code')]
+            for entry in counselor_directory() if entry['is_available']
+        ]
+        payload = _compact({
+            'counselor_fields': ['id', 'name', 'specialization', 'languages', 'institution'],
+            'counselors': counselors,
+            'slot_fields': ['slot_id', 'date', 'time', 'online'],
+            'slots': slots,
+        })
+        cache.set(key, payload, PAYLOAD_TTL)
+    return version, payload
+
+
+def appointments_version(user):
+    """Short tag that changes whenever the user's appointments do"""
+    if not user.is_authenticated:
+        return '0'
+    state = Appointment.objects.filter(student=user).aggregate(count=Count('pk'), last=Max('updated_at'))
+    return f"{state['count']}.{int(state['last'].timestamp()) if state['last'] else 0}"
+
+
+def user_appointments(user, today):
+    if not user.is_authenticated:
+        return []
+    rows = Appointment.objects.filter(
+        student=user, date__gte=today, status__in=('pending', 'confirmed')
+    ).order_by('date', 'time').values_list('pk', 'counselor_id', 'date', 'time', 'status')[:APPOINTMENT_LIMIT]
+    return [[pk, counselor_id, day.isoformat(), time.strftime('%H:%M'), status]
+            for pk, counselor_id, day, time, status in rows]
+
+
+def build_payload(version, shared, appointments):
+    return (
+        f'{{"version":{version},"data":{shared},'
+        f'"appointment_fields":["id","counselor_id","date","time","status"],'
+        f'"appointments":{_compact(appointments)},"status":"success"}}'
+    )
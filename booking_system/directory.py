@@ -0,0 +1,111 @@
+"""
+One directory of counselors across ``accounts`` and ``booking_system``.
+
+``booking_system.Counselor`` (bookable profile) and ``accounts.Counselor``
+(institution profile) describe the same person through their shared user.
+The directory joins the two with a single ``select_related`` query, merges
+their languages into ``CounselorLanguage`` codes, and caches the result in the
+default cache per institution. Any change to either counselor model or their
+languages bumps a version number, which retires every cached directory.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+VERSION_KEY = 'booking:directory:version'
+DIRECTORY_KEY = 'booking:directory:{version}:{institution}'
+DIRECTORY_TTL = 60 * 60
+
+
+def language_code(value):
+    """Map a language name ('Tamil') or code ('ta', 'ta-IN') to a settings.LANGUAGES code"""
+    value = (value or '').strip().casefold()
+    for code, name in settings.LANGUAGES:
+        if value in (code, name.casefold()):
+            return code
+    return value.split('-')[0]
+
+
+def sync_languages(counselor):
+    """Rebuild CounselorLanguage rows from both counselor profiles"""
+    from accounts.models import Counselor as InstitutionCounselor
+
+    from .models import CounselorLanguage
+
+    codes = {language_code(lang) for lang in counselor.languages.split(',') if lang.strip()}
+    codes.update(
+        language_code(lang)
+        for lang in InstitutionCounselor.objects.filter(user_id=counselor.user_id)
+        .values_list('languages__language_code', flat=True)
+        if lang
+    )
+    current = set(counselor.language_entries.values_list('code', flat=True))
+    counselor.language_entries.exclude(code__in=codes).delete()
+    CounselorLanguage.objects.bulk_create(
+        [CounselorLanguage(counselor=counselor, code=code) for code in codes - current],
+        ignore_conflicts=True,
+    )
+
+
+def invalidate():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def _entry(counselor):
+    user = counselor.user
+    profile = getattr(user, 'counselor_profile', None)
+    institution = profile.institution if profile is not None else None
+    return {
+        'id': counselor.pk,
+        'user_id': user.pk,
+        'name': user.get_full_name() or user.username,
+        'specialization': counselor.specialization,
+        'bio': counselor.bio,
+        'languages': sorted(entry.code for entry in counselor.language_entries.all()),
+        'is_available': counselor.is_available and (profile is None or profile.is_active),
+        'room_location': profile.room_location if profile is not None else '',
+        'institution': {
+            'id': institution.pk,
+            'code': institution.code,
+            'name': institution.name,
+        } if institution is not None else None,
+    }
+
+
+def load_directory(institution_id=None):
+    """Query the directory from the database (two queries: counselors, languages)"""
+    from .models import Counselor, CounselorLanguage
+
+    counselors = Counselor.objects.select_related(
+        'user', 'user__counselor_profile__institution'
+    ).prefetch_related(
+        Prefetch('language_entries', queryset=CounselorLanguage.objects.only('counselor_id', 'code'))
+    ).order_by('user__last_name', 'user__first_name', 'pk')
+    if institution_id is not None:
+        counselors = counselors.filter(user__counselor_profile__institution_id=institution_id)
+    return [_entry(counselor) for counselor in counselors]
+
+
+def counselor_directory(institution_id=None):
+    """Return the cached directory, optionally limited to one institution"""
+    version = cache.get_or_set(VERSION_KEY, 1, timeout=None)
+    key = DIRECTORY_KEY.format(version=version, institution='all' if institution_id is None else institution_id)
+    directory = cache.get(key)
+    if directory is None:
+        directory = load_directory(institution_id)
+        cache.set(key, directory, DIRECTORY_TTL)
+    return directory
+
+
+def filter_directory(directory, language=None, specialization=None, available_only=True):
+    language = language_code(language) if language else None
+    specialization = specialization.casefold() if specialization else None
+    return [
+        entry for entry in directory
+        if (not available_only or entry['is_available'])
+        and (language is None or language in entry['languages'])
+        and (specialization is None or specialization in entry['specialization'].casefold())
+    ]
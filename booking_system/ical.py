@@ -0,0 +1,122 @@
+"""
+iCalendar (RFC 5545) feeds of appointments.
+
+Feeds cover a fixed window around today and are written one event at a time
+from a ``values_list`` iterator, so an institution with many thousands of
+appointments is served in constant memory. The ETag and Last-Modified of a
+feed come from a single aggregate (latest ``updated_at`` and row count) over
+the same window, so calendar clients that poll get a 304 without any events
+being read. Cancelled appointments stay in the feed with STATUS:CANCELLED so
+clients remove them.
+
+Calendar clients can't log in, so feed URLs carry a signed token
+(``feed_token``) instead.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Appointment
+
+PAST_DAYS = 30
+FUTURE_DAYS = 180
+CHUNK_SIZE = 2000
+TOKEN_SALT = 'booking_system.ical'
+STATUSES = {'pending': 'TENTATIVE', 'cancelled': 'CANCELLED'}
+
+
+def feed_token(kind, pk):
+    """Token that grants read access to the ``kind`` ('counselor' or 'institution') feed ``pk``"""
+    return signing.Signer(salt=TOKEN_SALT).signature(f'{kind}:{pk}')
+
+
+def check_token(kind, pk, token):
+    return bool(token) and signing.constant_time_compare(token, feed_token(kind, pk))
+
+
+def feed_queryset(counselor_id=None, institution_id=None):
+    today = timezone.localdate()
+    appointments = Appointment.objects.filter(
+        date__gte=today - timedelta(days=PAST_DAYS),
+        date__lt=today + timedelta(days=FUTURE_DAYS),
+    )
+    if counselor_id is not None:
+        appointments = appointments.filter(counselor_id=counselor_id)
+    if institution_id is not None:
+        appointments = appointments.filter(counselor__user__counselor_profile__institution_id=institution_id)
+    return appointments
+
+
+def feed_version(appointments):
+    """Return ``(etag, last_modified)`` for a feed queryset"""
+    state = appointments.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    last_modified = state['last_modified']
+    stamp = int(last_modified.timestamp() * 1000) if last_modified else 0
+    # The window moves with the date, so the date is part of the version too
+    return f'"{timezone.localdate():%Y%m%d}-{state["count"]}-{stamp}"', last_modified
+
+
+def _escape(value):
+    return (value.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Split a content line into 75-octet lines as RFC 5545 requires"""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def generate_feed(appointments, name, show_counselor=False):
+    """Yield a VCALENDAR for ``appointments``, one event per chunk"""
+    host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS and settings.ALLOWED_HOSTS[0] != '*' else 'localhost'
+    length = timedelta(minutes=getattr(settings, 'BOOKING_SLOT_MINUTES', 60))
+    zone = timezone.get_current_timezone()
+
+    yield (
+        'BEGIN:VCALENDAR\r\n'
+        'VERSION:2.0\r\n'
+        'PRODID:-//Mental Health Platform//Appointments//EN\r\n'
+        'CALSCALE:GREGORIAN\r\n'
+        + _fold(f'X-WR-CALNAME:{_escape(name)}')
+    )
+
+    rows = appointments.order_by('date', 'time').values_list(
+        'pk', 'date', 'time', 'status', 'updated_at',
+        'counselor__user__first_name', 'counselor__user__last_name',
+    )
+    for pk, day, start, status, updated_at, first_name, last_name in rows.iterator(chunk_size=CHUNK_SIZE):
+        starts_at = timezone.make_aware(datetime.combine(day, start), zone)
+        summary = 'Counseling session'
+        if show_counselor:
+            summary = f'{summary} - {first_name} {last_name}'.strip()
+        yield (
+            'BEGIN:VEVENT\r\n'
+            f'UID:appointment-{pk}@{host}\r\n'
+            f'DTSTAMP:{_utc(updated_at)}\r\n'
+            f'LAST-MODIFIED:{_utc(updated_at)}\r\n'
+            f'DTSTART:{_utc(starts_at)}\r\n'
+            f'DTEND:{_utc(starts_at + length)}\r\n'
+            + _fold(f'SUMMARY:{_escape(summary)}')
+            + f'STATUS:{STATUSES.get(status, "CONFIRMED")}\r\n'
+            'END:VEVENT\r\n'
+        )
+    yield 'END:VCALENDAR\r\n'
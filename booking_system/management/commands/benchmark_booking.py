@@ -0,0 +1,242 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from booking_system.models import Appointment, AvailableSlot, Counselor
+from booking_system.services import BookingConflict, SlotUnavailable, book_slot
+
+PREFIX = 'bench-'
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Benchmark concurrent bookings through booking_system.services: throughput, '
+            'conflict rate, latency and double-bookings')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200, help='Simulated students (default: 200)')
+        parser.add_argument('--counselors', type=int, default=10, help='Counselors to seed (default: 10)')
+        parser.add_argument('--slots', type=int, default=20, help='Slots per counselor (default: 20)')
+        parser.add_argument('--attempts', type=int, default=3, help='Booking attempts per student (default: 3)')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent workers (default: 16)')
+        parser.add_argument(
+            '--hot-fraction',
+            type=float,
+            default=0.2,
+            help='Share of slots that most students compete for, between 0 and 1 (default: 0.2)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        parser.add_argument(
+            '--live',
+            action='store_true',
+            help='Run against the configured database instead of a fresh test database. '
+                 'Seeded rows are prefixed with "bench-" and removed afterwards',
+        )
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        for name in ('students', 'counselors', 'slots', 'attempts', 'threads'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} must be at least 1')
+        if not 0 < options['hot_fraction'] <= 1:
+            raise CommandError('--hot-fraction must be in (0, 1]')
+
+        test_db = None
+        if not options['live']:
+            test_db = self._create_test_db()
+        try:
+            report = self._run(options)
+        finally:
+            if test_db is not None:
+                connections.close_all()
+                connection.creation.destroy_test_db(test_db, verbosity=0)
+            else:
+                self._cleanup()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report)
+        if report['double_bookings'] or report['inconsistent_slots']:
+            raise CommandError('Double-bookings or inconsistent slots detected')
+
+    # Setup
+
+    def _create_test_db(self):
+        """Create a test database for the configured backend and return the original name"""
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            # A file rather than the shared in-memory database, so locking
+            # behaves as it does in production
+            handle, path = tempfile.mkstemp(prefix='booking-bench-', suffix='.sqlite3')
+            os.close(handle)
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = path
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        return old_name
+
+    def _seed(self, options):
+        run = f'{PREFIX}{int(time.time())}'
+        User.objects.bulk_create([
+            User(username=f'{run}-counselor-{i}', first_name='Bench', last_name=f'Counselor {i}')
+            for i in range(options['counselors'])
+        ] + [
+            User(username=f'{run}-student-{i}') for i in range(options['students'])
+        ], batch_size=1000)
+        users = User.objects.filter(username__startswith=run)
+        Counselor.objects.bulk_create([
+            Counselor(user=user, specialization='benchmark', languages='English')
+            for user in users.filter(username__contains='-counselor-')
+        ])
+
+        start_day = timezone.localdate() + timedelta(days=1)
+        counselor_ids = list(Counselor.objects.filter(user__username__startswith=run).values_list('pk', flat=True))
+        slots = []
+        for counselor_id in counselor_ids:
+            for i in range(options['slots']):
+                day = start_day + timedelta(days=i // 8)
+                start = datetime.combine(day, datetime.min.time()) + timedelta(hours=9 + i % 8)
+                slots.append(AvailableSlot(
+                    counselor_id=counselor_id, date=day,
+                    start_time=start.time(), end_time=(start + timedelta(hours=1)).time(),
+                ))
+        AvailableSlot.objects.bulk_create(slots, batch_size=1000)
+
+        students = list(users.filter(username__contains='-student-'))
+        slot_ids = list(AvailableSlot.objects.filter(counselor_id__in=counselor_ids).values_list('pk', flat=True))
+        return students, counselor_ids, slot_ids
+
+    def _cleanup(self):
+        users = User.objects.filter(username__startswith=PREFIX)
+        Appointment.objects.filter(Q(student__in=users) | Q(counselor__user__in=users)).delete()
+        AvailableSlot.objects.filter(counselor__user__in=users).delete()
+        Counselor.objects.filter(user__in=users).delete()
+        users.delete()
+
+    # Running
+
+    def _run(self, options):
+        students, counselor_ids, slot_ids = self._seed(options)
+        rng = random.Random(options['seed'])
+        hot = slot_ids[:max(int(len(slot_ids) * options['hot_fraction']), 1)]
+        plans = [
+            (student, [rng.choice(hot if rng.random() < 0.8 else slot_ids) for _ in range(options['attempts'])])
+            for student in students
+        ]
+
+        latencies = []
+        outcomes = {'booked': 0, 'conflict': 0, 'busy': 0, 'error': 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(min(options['threads'], len(plans)))
+
+        def student_run(plan):
+            student, targets = plan
+            local = []
+            try:
+                for slot_id in targets:
+                    started = time.perf_counter()
+                    try:
+                        book_slot(student, slot_id)
+                        outcome = 'booked'
+                    except SlotUnavailable:
+                        outcome = 'conflict'
+                    except BookingConflict:
+                        outcome = 'busy'
+                    except Exception:
+                        outcome = 'error'
+                    local.append((outcome, time.perf_counter() - started))
+            finally:
+                connections.close_all()
+            with lock:
+                for outcome, latency in local:
+                    outcomes[outcome] += 1
+                    latencies.append(latency)
+
+        def run(indexed_plan):
+            index, plan = indexed_plan
+            if index < barrier.parties:
+                # Line the first wave up so it really starts at the same time
+                try:
+                    barrier.wait(timeout=10)
+                except threading.BrokenBarrierError:
+                    pass
+            student_run(plan)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(run, enumerate(plans)))
+        elapsed = time.perf_counter() - started
+
+        return self._report(options, counselor_ids, slot_ids, outcomes, latencies, elapsed)
+
+    def _report(self, options, counselor_ids, slot_ids, outcomes, latencies, elapsed):
+        # The database constraint should make this impossible; backends
+        # without conditional unique constraints (e.g. MySQL) rely on the
+        # conditional slot claim alone
+        double_bookings = (
+            Appointment.objects.filter(counselor_id__in=counselor_ids).exclude(status='cancelled')
+            .values('counselor', 'date', 'time').annotate(n=Count('pk')).filter(n__gt=1).count()
+        )
+        booked_slots = AvailableSlot.objects.filter(pk__in=slot_ids, is_booked=True).count()
+        attempts = sum(outcomes.values())
+        latencies_ms = [latency * 1000 for latency in latencies]
+        return {
+            'database': connection.vendor,
+            'threads': options['threads'],
+            'students': options['students'],
+            'slots': len(slot_ids),
+            'attempts': attempts,
+            **outcomes,
+            'seconds': round(elapsed, 3),
+            'bookings_per_second': round(outcomes['booked'] / elapsed, 1) if elapsed else 0.0,
+            'attempts_per_second': round(attempts / elapsed, 1) if elapsed else 0.0,
+            'conflict_rate': round(outcomes['conflict'] / attempts, 4) if attempts else 0.0,
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies_ms), 2) if latencies_ms else 0.0,
+                'p50': round(_percentile(latencies_ms, 0.50), 2),
+                'p99': round(_percentile(latencies_ms, 0.99), 2),
+                'max': round(max(latencies_ms, default=0.0), 2),
+            },
+            'double_bookings': double_bookings,
+            # Every successful booking flips exactly one slot
+            'inconsistent_slots': abs(booked_slots - outcomes['booked']),
+        }
+
+    def _print(self, report):
+        latency = report['latency_ms']
+        self.stdout.write(
+            f"Database: {report['database']}, {report['threads']} threads, "
+            f"{report['students']} students, {report['slots']} slots"
+        )
+        self.stdout.write(
+            f"Attempts: {report['attempts']} (booked {report['booked']}, conflicts {report['conflict']}, "
+            f"busy {report['busy']}, errors {report['error']}) in {report['seconds']}s"
+        )
+        self.stdout.write(
+            f"Throughput: {report['bookings_per_second']} bookings/s, {report['attempts_per_second']} attempts/s"
+        )
+        self.stdout.write(f"Conflict rate: {report['conflict_rate']:.1%}")
+        self.stdout.write(
+            f"Latency: mean {latency['mean']}ms, p50 {latency['p50']}ms, p99 {latency['p99']}ms, max {latency['max']}ms"
+        )
+        style = self.style.SUCCESS if not (report['double_bookings'] or report['inconsistent_slots']) else self.style.ERROR
+        self.stdout.write(style(
+            f"Double-bookings: {report['double_bookings']}, inconsistent slots: {report['inconsistent_slots']}"
+        ))
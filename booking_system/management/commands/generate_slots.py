@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking_system.slots import generate_slots
+
+
+class Command(BaseCommand):
+    help = 'Generate bookable appointment slots from counselor weekly availability'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='How many days ahead to generate (default: BOOKING_HORIZON_DAYS)',
+        )
+        parser.add_argument(
+            '--slot-minutes',
+            type=int,
+            help='Length of each slot in minutes (default: BOOKING_SLOT_MINUTES)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Regenerate every day from today instead of only days after the last generated slot',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        if options['slot_minutes'] is not None and options['slot_minutes'] < 5:
+            raise CommandError('--slot-minutes must be at least 5')
+
+        started = time.monotonic()
+        count = generate_slots(
+            horizon_days=options['days'],
+            slot_minutes=options['slot_minutes'],
+            full=options['full'],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Generated up to {count} slots in {time.monotonic() - started:.2f}s')
+        )
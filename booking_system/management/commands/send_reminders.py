@@ -0,0 +1,66 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from booking_system.models import SentReminder
+from booking_system.reminders import send_due_reminders
+
+
+class Command(BaseCommand):
+    help = 'Send due reminders for appointments and scheduled offline support tickets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and check for due reminders every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='Seconds between runs with --loop (default: 60)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Reminders claimed and sent per batch (default: REMINDERS BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--lookback',
+            type=int,
+            help='Minutes of missed reminders to catch up on (default: REMINDERS LOOKBACK_MINUTES)',
+        )
+        parser.add_argument(
+            '--prune-days',
+            type=int,
+            default=30,
+            help='Delete idempotency records older than this many days (default: 30)',
+        )
+
+    def handle(self, *args, **options):
+        if options['interval'] < 1:
+            raise CommandError('--interval must be at least 1')
+        if options['lookback'] is not None and options['lookback'] < 1:
+            raise CommandError('--lookback must be at least 1')
+        # Records must outlive the longest window in which their key can recur
+        if options['prune_days'] < 2:
+            raise CommandError('--prune-days must be at least 2')
+
+        while True:
+            started = time.monotonic()
+            sent = send_due_reminders(batch_size=options['batch_size'], lookback=options['lookback'])
+            pruned, _ = SentReminder.objects.filter(
+                created_at__lt=timezone.now() - timedelta(days=options['prune_days'])
+            ).delete()
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Sent {sent} reminders in {time.monotonic() - started:.2f}s'
+                + (f', pruned {pruned} old records' if pruned else '')
+            ))
+            if not options['loop']:
+                return
+            connections.close_all()
+            time.sleep(max(options['interval'] - (time.monotonic() - started), 0))
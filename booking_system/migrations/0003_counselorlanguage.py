@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_system', '0002_appointment_active_slot_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounselorLanguage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(db_index=True, help_text="Code from settings.LANGUAGES, e.g. 'ta'", max_length=10)),
+                ('counselor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='language_entries', to='booking_system.counselor')),
+            ],
+            options={
+                'unique_together': {('counselor', 'code')},
+            },
+        ),
+    ]
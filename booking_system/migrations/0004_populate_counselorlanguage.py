@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def language_code(value):
+    value = value.strip().casefold()
+    for code, name in settings.LANGUAGES:
+        if value in (code, name.casefold()):
+            return code
+    return value.split('-')[0]
+
+
+def populate(apps, schema_editor):
+    Counselor = apps.get_model('booking_system', 'Counselor')
+    CounselorLanguage = apps.get_model('booking_system', 'CounselorLanguage')
+    InstitutionCounselor = apps.get_model('accounts', 'Counselor')
+
+    institution_languages = {}
+    for user_id, code in InstitutionCounselor.objects.filter(
+        user__isnull=False, languages__isnull=False
+    ).values_list('user_id', 'languages__language_code'):
+        institution_languages.setdefault(user_id, set()).add(language_code(code))
+
+    entries = []
+    for pk, user_id, languages in Counselor.objects.values_list('pk', 'user_id', 'languages'):
+        codes = {language_code(lang) for lang in languages.split(',') if lang.strip()}
+        codes |= institution_languages.get(user_id, set())
+        entries.extend(CounselorLanguage(counselor_id=pk, code=code) for code in codes)
+    CounselorLanguage.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('booking_system', '0003_counselorlanguage'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
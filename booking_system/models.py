@@ -11,6 +11,17 @@ class Counselor(models.Model):
     def __str__(self):
         return f"Dr. {self.user.get_full_name()}"
 
+class CounselorLanguage(models.Model):
+    """Normalized language codes for a counselor, kept in sync by booking_system.directory"""
+    counselor = models.ForeignKey(Counselor, on_delete=models.CASCADE, related_name='language_entries')
+    code = models.CharField(max_length=10, db_index=True, help_text="Code from settings.LANGUAGES, e.g. 'ta'")
+    
+    class Meta:
+        unique_together = ['counselor', 'code']
+    
+    def __str__(self):
+        return f"{self.counselor} - {self.code}"
+
 class Appointment(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -29,8 +40,19 @@ class Appointment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        unique_together = ['counselor', 'date', 'time']
         ordering = ['-date', '-time']
+        indexes = [
+            # Time-window scans, e.g. for reminders
+            models.Index(fields=['date', 'time'], name='appointment_start_idx'),
+        ]
+        constraints = [
+            # Cancelled appointments keep their history without blocking the slot
+            models.UniqueConstraint(
+                fields=['counselor', 'date', 'time'],
+                condition=~models.Q(status='cancelled'),
+                name='unique_active_appointment_per_slot',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student.username} with {self.counselor} on {self.date}"
@@ -47,3 +69,54 @@ class AvailableSlot(models.Model):
     
     def __str__(self):
         return f"{self.counselor} - {self.date} {self.start_time}-{self.end_time}"
+
+class WaitlistEntry(models.Model):
+    """A student waiting for a slot with a counselor on a given day"""
+    PRIORITY_CHOICES = [
+        (0, 'Routine'),
+        (1, 'High'),
+        (2, 'Urgent'),
+    ]
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('booked', 'Booked'),
+        ('withdrawn', 'Withdrawn'),
+    ]
+    
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlist_entries')
+    counselor = models.ForeignKey(Counselor, on_delete=models.CASCADE, related_name='waitlist_entries')
+    date = models.DateField()
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    appointment = models.OneToOneField(Appointment, on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='waitlist_entry')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-priority', 'created_at']
+        indexes = [
+            # Next student in line for a counselor's day
+            models.Index(fields=['counselor', 'date', 'status', '-priority', 'created_at'],
+                         name='waitlist_queue_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'counselor', 'date'],
+                condition=models.Q(status='waiting'),
+                name='unique_waiting_entry',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.student.username} waiting for {self.counselor} on {self.date}"
+
+class SentReminder(models.Model):
+    """Idempotency record of a reminder, keyed by event, start time, offset and recipient"""
+    key = models.CharField(max_length=200, unique=True)
+    run_id = models.CharField(max_length=32, db_index=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return self.key
@@ -0,0 +1,260 @@
+"""
+Reminders for upcoming appointments and scheduled offline support tickets.
+
+Each run looks, for every offset in ``REMINDERS['OFFSETS']`` (minutes before
+the start), at events starting within ``[now + offset - lookback, now + offset]``.
+These are small index range scans (``appointment_start_idx`` and
+``ticket_schedule_idx``), independent of table size. Overlapping windows of
+consecutive runs are harmless: every reminder has an idempotency key, and
+SentReminder rows with those keys are inserted (claimed) before sending, so a
+key is sent at most once no matter how often or how many times in parallel
+the scheduler runs. Claims whose sending failed are removed again so the next
+run retries them.
+
+Reminders are sent in batches through the sender configured in
+``REMINDERS['SENDER']``, e.g.::
+
+    REMINDERS = {
+        'SENDER': {'BACKEND': 'booking_system.reminders.FileSender',
+                   'OPTIONS': {'path': 'reminders.jsonl'}},
+    }
+"""
+import json
+import logging
+import sys
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Appointment, SentReminder
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'OFFSETS': [24 * 60, 60],
+    'LOOKBACK_MINUTES': 15,
+    'BATCH_SIZE': 500,
+    'SENDER': {'BACKEND': 'booking_system.reminders.ConsoleSender', 'OPTIONS': {}},
+}
+
+
+def reminder_setting(name):
+    return getattr(settings, 'REMINDERS', {}).get(name, DEFAULTS[name])
+
+
+@dataclass
+class Reminder:
+    key: str
+    kind: str
+    object_id: int
+    email: str
+    starts_at: datetime
+    subject: str
+    body: str
+
+
+# Senders
+
+class ReminderSender:
+    """Base class for reminder senders"""
+
+    def send_batch(self, reminders):
+        """Send ``reminders`` and return the keys of the ones that were sent"""
+        raise NotImplementedError
+
+
+class ConsoleSender(ReminderSender):
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send_batch(self, reminders):
+        for reminder in reminders:
+            self.stream.write(f'[{reminder.key}] To: {reminder.email} - {reminder.subject}\n')
+        self.stream.flush()
+        return {reminder.key for reminder in reminders}
+
+
+class FileSender(ReminderSender):
+    """Append reminders to a JSON Lines file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send_batch(self, reminders):
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            for reminder in reminders:
+                fh.write(json.dumps(asdict(reminder), default=str) + '\n')
+        return {reminder.key for reminder in reminders}
+
+
+class EmailSender(ReminderSender):
+    """Send reminders by email over one connection per batch"""
+
+    def __init__(self, from_email=None, backend=None):
+        self.from_email = from_email
+        self.backend = backend
+
+    def send_batch(self, reminders):
+        reminders = [reminder for reminder in reminders if reminder.email]
+        connection = get_connection(self.backend)
+        sent = set()
+        with connection:
+            for reminder in reminders:
+                message = EmailMessage(
+                    reminder.subject, reminder.body, self.from_email, [reminder.email], connection=connection
+                )
+                try:
+                    message.send()
+                except Exception:
+                    logger.exception('Failed to send reminder %s', reminder.key)
+                else:
+                    sent.add(reminder.key)
+        return sent
+
+
+@lru_cache(maxsize=None)
+def get_sender():
+    """Return the configured reminder sender"""
+    config = reminder_setting('SENDER')
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+# Finding due reminders
+
+def _key(kind, pk, starts_at, offset, recipient):
+    return f'{kind}:{pk}:{starts_at:%Y%m%dT%H%M}:{offset}:{recipient}'
+
+
+def _date_time_range(start, end):
+    """Q for appointments whose (date, time) lies in the local range [start, end]"""
+    if start.date() == end.date():
+        return Q(date=start.date(), time__gte=start.time(), time__lte=end.time())
+    return (
+        Q(date=start.date(), time__gte=start.time())
+        | Q(date__gt=start.date(), date__lt=end.date())
+        | Q(date=end.date(), time__lte=end.time())
+    )
+
+
+def due_appointment_reminders(now, offset, lookback):
+    end = timezone.localtime(now + timedelta(minutes=offset))
+    start = end - timedelta(minutes=lookback)
+    rows = Appointment.objects.filter(
+        _date_time_range(start.replace(tzinfo=None), end.replace(tzinfo=None)),
+        status__in=('pending', 'confirmed'),
+    ).values_list(
+        'pk', 'date', 'time', 'student_id', 'student__email',
+        'counselor__user__first_name', 'counselor__user__last_name',
+    )
+    for pk, day, time, student_id, email, first_name, last_name in rows.iterator():
+        starts_at = timezone.make_aware(datetime.combine(day, time))
+        if starts_at <= now:
+            continue
+        yield Reminder(
+            key=_key('appointment', pk, starts_at, offset, f'user{student_id}'),
+            kind='appointment',
+            object_id=pk,
+            email=email,
+            starts_at=starts_at,
+            subject='Reminder: upcoming counseling session',
+            body=f'Your session with {first_name} {last_name} is on '
+                 f'{timezone.localtime(starts_at):%A %d %B at %H:%M}.',
+        )
+
+
+def due_ticket_reminders(now, offset, lookback):
+    from accounts.models import OfflineSupportTicket
+
+    end = now + timedelta(minutes=offset)
+    rows = OfflineSupportTicket.objects.filter(
+        status='scheduled',
+        scheduled_for__gte=max(end - timedelta(minutes=lookback), now),
+        scheduled_for__lte=end,
+    ).values_list(
+        'pk', 'scheduled_for', 'subject', 'created_by_id', 'created_by__email',
+        'counselor_id', 'counselor__email', 'counselor__room_location',
+    )
+    for pk, starts_at, subject, user_id, user_email, counselor_id, counselor_email, room in rows.iterator():
+        when = f'{timezone.localtime(starts_at):%A %d %B at %H:%M}'
+        where = f' in {room}' if room else ''
+        recipients = []
+        if user_id:
+            recipients.append((f'user{user_id}', user_email))
+        if counselor_id:
+            recipients.append((f'counselor{counselor_id}', counselor_email))
+        for recipient, email in recipients:
+            yield Reminder(
+                key=_key('ticket', pk, starts_at, offset, recipient),
+                kind='ticket',
+                object_id=pk,
+                email=email,
+                starts_at=starts_at,
+                subject=f'Reminder: {subject}',
+                body=f'Your offline support session is on {when}{where}.',
+            )
+
+
+def due_reminders(now=None, lookback=None):
+    now = now or timezone.now()
+    lookback = lookback or reminder_setting('LOOKBACK_MINUTES')
+    for offset in reminder_setting('OFFSETS'):
+        yield from due_appointment_reminders(now, offset, lookback)
+        yield from due_ticket_reminders(now, offset, lookback)
+
+
+# Dispatching
+
+def _claim(reminders, run_id):
+    """Insert idempotency rows and return the reminders this run now owns"""
+    by_key = {reminder.key: reminder for reminder in reminders}
+    taken = set(SentReminder.objects.filter(key__in=by_key).values_list('key', flat=True))
+    SentReminder.objects.bulk_create(
+        [SentReminder(key=key, run_id=run_id) for key in by_key if key not in taken],
+        ignore_conflicts=True,
+    )
+    # Only rows inserted by this run carry its run_id, even if another run
+    # raced for the same keys
+    owned = SentReminder.objects.filter(run_id=run_id, key__in=by_key).values_list('key', flat=True)
+    return [by_key[key] for key in owned]
+
+
+def _dispatch(batch, sender, run_id):
+    claimed = _claim(batch, run_id)
+    if not claimed:
+        return 0
+    try:
+        sent = sender.send_batch(claimed)
+    except Exception:
+        logger.exception('Reminder sender failed for a batch of %d', len(claimed))
+        sent = set()
+    failed = [reminder.key for reminder in claimed if reminder.key not in sent]
+    if failed:
+        # Release the claims so the next run retries them
+        SentReminder.objects.filter(run_id=run_id, key__in=failed).delete()
+    if sent:
+        SentReminder.objects.filter(run_id=run_id, key__in=sent).update(sent_at=timezone.now())
+    return len(sent)
+
+
+def send_due_reminders(now=None, batch_size=None, lookback=None, sender=None):
+    """Send every due reminder that was not sent before; return how many were sent"""
+    batch_size = batch_size or reminder_setting('BATCH_SIZE')
+    sender = sender or get_sender()
+    run_id = uuid.uuid4().hex
+    total = 0
+    batch = []
+    for reminder in due_reminders(now, lookback):
+        batch.append(reminder)
+        if len(batch) >= batch_size:
+            total += _dispatch(batch, sender, run_id)
+            batch = []
+    if batch:
+        total += _dispatch(batch, sender, run_id)
+    return total
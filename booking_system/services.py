@@ -0,0 +1,114 @@
+"""
+Appointment booking and cancellation.
+
+A slot is claimed with a conditional ``UPDATE ... WHERE is_booked = false``
+that also requires the slot to start in the future and its counselor to be
+available: exactly one concurrent request can flip the flag, and nothing is
+checked in a separate read that could go stale before the write, so bookings
+of different slots never wait on each other and no row locks are needed on
+any backend.
+The Appointment is created in the same transaction, so a failure after the
+claim releases the slot again.
+"""
+import random
+import time
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Appointment, AvailableSlot, Counselor
+from .signals import slot_booked, slot_released
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+
+class BookingError(Exception):
+    """Base class for booking failures"""
+
+
+class SlotUnavailable(BookingError):
+    """The slot does not exist or was booked by someone else"""
+
+
+class SlotClosed(SlotUnavailable):
+    """The slot has already started or its counselor is not taking bookings"""
+
+
+class BookingConflict(BookingError):
+    """The booking could not be completed after retrying"""
+
+
+def _bookable(slots):
+    """Restrict ``slots`` to those starting later than now whose counselor is available"""
+    now = timezone.localtime().replace(tzinfo=None)
+    # A subquery rather than a join keeps the claim a single-table UPDATE
+    # that re-checks its own conditions on the row it writes
+    available = Counselor.objects.filter(pk=OuterRef('counselor_id'), is_available=True).exclude(
+        user__counselor_profile__is_active=False
+    )
+    return slots.filter(
+        Q(date__gt=now.date()) | Q(date=now.date(), start_time__gt=now.time()),
+        Exists(available),
+    )
+
+
+def _claim_and_create(student, slot_id, notes):
+    with transaction.atomic():
+        claimed = _bookable(AvailableSlot.objects.filter(pk=slot_id, is_booked=False)).update(is_booked=True)
+        if not claimed:
+            if AvailableSlot.objects.filter(pk=slot_id, is_booked=False).exists():
+                raise SlotClosed('This slot can no longer be booked.')
+            raise SlotUnavailable('This slot is no longer available.')
+        slot = AvailableSlot.objects.get(pk=slot_id)
+        appointment = Appointment.objects.create(
+            student=student,
+            counselor_id=slot.counselor_id,
+            date=slot.date,
+            time=slot.start_time,
+            notes=notes,
+        )
+        transaction.on_commit(lambda: slot_booked.send(sender=AvailableSlot, slot=slot))
+        return appointment
+
+
+def book_slot(student, slot_id, notes='', retries=3):
+    """
+    Book ``slot_id`` for ``student`` and return the Appointment.
+
+    Raises SlotUnavailable if another student got the slot first, SlotClosed
+    if it has started or its counselor is unavailable, and BookingConflict if
+    the database stayed busy through every retry.
+    """
+    for attempt in range(retries):
+        try:
+            return _claim_and_create(student, slot_id, notes)
+        except IntegrityError:
+            # An active appointment already occupies this counselor/date/time
+            raise SlotUnavailable('This slot is no longer available.')
+        except OperationalError:
+            # SQLite reports write contention as "database is locked"
+            if attempt == retries - 1:
+                break
+            time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+    raise BookingConflict('The booking service is busy. Please try again.')
+
+
+def cancel_appointment(appointment):
+    """Cancel ``appointment`` and free its slot; return False if it was not active"""
+    with transaction.atomic():
+        updated = Appointment.objects.filter(
+            pk=appointment.pk, status__in=ACTIVE_STATUSES
+        ).update(status='cancelled', updated_at=timezone.now())
+        if not updated:
+            return False
+        slots = AvailableSlot.objects.filter(
+            counselor_id=appointment.counselor_id,
+            date=appointment.date,
+            start_time=appointment.time,
+        )
+        slots.update(is_booked=False)
+        for slot in slots:
+            transaction.on_commit(lambda slot=slot: slot_released.send(sender=AvailableSlot, slot=slot))
+    appointment.status = 'cancelled'
+    return True
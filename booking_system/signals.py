@@ -0,0 +1,80 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from accounts.models import Counselor as InstitutionCounselor
+
+from . import directory
+from .availability import RESET, publish, slot_change
+from .models import AvailableSlot, Counselor
+
+# Sent by booking_system.services once the booking or cancellation has been
+# committed, with the AvailableSlot as ``slot``. AvailableSlot.is_booked is
+# changed with queryset updates there, so post_save does not fire.
+slot_booked = Signal()
+slot_released = Signal()
+
+# Sent after slots were created in bulk (e.g. by generate_slots)
+slots_generated = Signal()
+
+
+@receiver(slot_booked)
+def publish_booked_slot(sender, slot, **kwargs):
+    publish(slot_change(slot, free=False))
+
+
+@receiver(slot_released)
+def publish_released_slot(sender, slot, **kwargs):
+    publish(slot_change(slot, free=True))
+
+
+@receiver(slot_released)
+def offer_released_slot(sender, slot, **kwargs):
+    from .waitlist import reallocation_queue
+
+    reallocation_queue.put(slot.pk)
+
+
+@receiver(post_save, sender=AvailableSlot)
+def publish_saved_slot(sender, instance, **kwargs):
+    publish(slot_change(instance, free=not instance.is_booked))
+
+
+@receiver(post_delete, sender=AvailableSlot)
+def publish_deleted_slot(sender, instance, **kwargs):
+    publish(slot_change(instance, free=False))
+
+
+@receiver(slots_generated)
+def publish_reset(sender, **kwargs):
+    publish(RESET)
+
+
+def _counselors_changed():
+    directory.invalidate()
+    publish(RESET)
+
+
+@receiver(post_save, sender=Counselor)
+def counselor_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        directory.sync_languages(instance)
+    _counselors_changed()
+
+
+@receiver(post_delete, sender=Counselor)
+def counselor_deleted(sender, instance, **kwargs):
+    _counselors_changed()
+
+
+@receiver([post_save, post_delete], sender=InstitutionCounselor)
+def institution_counselor_changed(sender, instance, **kwargs):
+    _counselors_changed()
+
+
+@receiver(m2m_changed, sender=InstitutionCounselor.languages.through)
+def institution_counselor_languages_changed(sender, instance, action, reverse, **kwargs):
+    if reverse or not action.startswith('post_'):
+        return
+    for counselor in Counselor.objects.filter(user_id=instance.user_id):
+        directory.sync_languages(counselor)
+    _counselors_changed()
@@ -0,0 +1,112 @@
+"""
+Materialize bookable AvailableSlot rows from weekly CounselorAvailability rules.
+
+Availability rules belong to ``accounts.Counselor`` while slots belong to
+``booking_system.Counselor``; the two are matched through their shared user.
+Each rule window is clipped to the institution's working hours and cut into
+``BOOKING_SLOT_MINUTES`` slots. Dates and times are local to ``TIME_ZONE``,
+as everywhere slots are read (booking, search, reminders, calendar feeds),
+and a run only covers days after the last slot already generated for a
+counselor, so it can be scheduled as often as needed.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.models import CounselorAvailability
+
+from .models import AvailableSlot, Counselor
+from .signals import slots_generated
+
+BULK_BATCH_SIZE = 5000
+
+
+def _cut(start, end, length):
+    """Yield ``(start, end)`` times of consecutive slots between two times"""
+    day = datetime(2000, 1, 1)
+    current = datetime.combine(day, start)
+    stop = datetime.combine(day, end)
+    while current + length <= stop:
+        yield current.time(), (current + length).time()
+        current += length
+
+
+def generate_slots(horizon_days=None, slot_minutes=None, full=False, counselor_ids=None):
+    """
+    Create slots up to ``horizon_days`` ahead; return the number of slots requested.
+
+    With ``full`` every day from today is regenerated instead of only the days
+    after each counselor's last slot. Existing slots are never duplicated.
+    """
+    horizon_days = horizon_days or getattr(settings, 'BOOKING_HORIZON_DAYS', 28)
+    length = timedelta(minutes=slot_minutes or getattr(settings, 'BOOKING_SLOT_MINUTES', 60))
+
+    rules = CounselorAvailability.objects.filter(
+        counselor__is_active=True,
+        counselor__user__isnull=False,
+    ).values_list(
+        'counselor__user_id', 'weekday', 'start_time', 'end_time',
+        'counselor__institution__working_hours_start',
+        'counselor__institution__working_hours_end',
+    )
+    rules_by_user = defaultdict(list)
+    for user_id, *rule in rules:
+        rules_by_user[user_id].append(rule)
+
+    counselors = Counselor.objects.filter(is_available=True, user_id__in=rules_by_user)
+    if counselor_ids is not None:
+        counselors = counselors.filter(pk__in=counselor_ids)
+    counselor_users = dict(counselors.values_list('pk', 'user_id'))
+
+    last_dates = {}
+    if not full:
+        last_dates = dict(
+            AvailableSlot.objects.filter(counselor_id__in=counselor_users)
+            .values('counselor')
+            .annotate(last=Max('date'))
+            .values_list('counselor', 'last')
+        )
+
+    now = timezone.localtime()
+    today = now.date()
+    pending = []
+    total = 0
+    for counselor_id, user_id in counselor_users.items():
+        by_weekday = defaultdict(list)
+        for weekday, start, end, open_at, close_at in rules_by_user[user_id]:
+            start, end = max(start, open_at), min(end, close_at)
+            if start < end:
+                by_weekday[weekday].extend(_cut(start, end, length))
+        if not by_weekday:
+            continue
+
+        first = today
+        if counselor_id in last_dates and last_dates[counselor_id] >= today:
+            first = last_dates[counselor_id] + timedelta(days=1)
+        last = today + timedelta(days=horizon_days)
+
+        day = first
+        while day <= last:
+            for start, end in by_weekday.get(day.weekday(), ()):
+                if day == today and start <= now.time():
+                    continue
+                pending.append(AvailableSlot(
+                    counselor_id=counselor_id, date=day, start_time=start, end_time=end
+                ))
+            day += timedelta(days=1)
+
+        # Flush whole counselors at a time so a failed run leaves no gaps
+        if len(pending) >= BULK_BATCH_SIZE:
+            AvailableSlot.objects.bulk_create(pending, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+            total += len(pending)
+            pending = []
+
+    if pending:
+        AvailableSlot.objects.bulk_create(pending, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+        total += len(pending)
+    if total:
+        slots_generated.send(sender=AvailableSlot, count=total)
+    return total
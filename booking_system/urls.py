@@ -6,4 +6,15 @@ urlpatterns = [
     path('book/', views.book_appointment, name='book'),
     path('counselors/', views.counselor_list, name='counselors'),
     path('my-appointments/', views.my_appointments, name='my_appointments'),
+    path('api/counselors/', views.counselor_directory_api, name='counselor_directory_api'),
+    path('api/bootstrap/', views.booking_bootstrap_api, name='booking_bootstrap_api'),
+    path('api/changes/', views.booking_changes_stream, name='booking_changes_stream'),
+    path('api/availability/', views.availability_search_api, name='availability_search_api'),
+    path('api/book/', views.book_slot_api, name='book_slot_api'),
+    path('api/appointments/<int:appointment_id>/cancel/', views.cancel_appointment_api, name='cancel_appointment_api'),
+    path('api/waitlist/', views.join_waitlist_api, name='join_waitlist_api'),
+    path('api/waitlist/<int:entry_id>/leave/', views.leave_waitlist_api, name='leave_waitlist_api'),
+    path('api/calendar-links/', views.calendar_links_api, name='calendar_links_api'),
+    path('calendar/counselor/<int:counselor_id>.ics', views.counselor_calendar, name='counselor_calendar'),
+    path('calendar/institution/<int:institution_id>.ics', views.institution_calendar, name='institution_calendar'),
 ]
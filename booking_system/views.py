@@ -1,5 +1,26 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET, require_POST
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from . import bootstrap
+from .availability import SEQ_KEY, availability_index
+from .directory import counselor_directory, filter_directory
+from . import ical
+from .models import Appointment, Counselor, WaitlistEntry
+from .services import BookingConflict, SlotClosed, SlotUnavailable, book_slot, cancel_appointment
+from .waitlist import WaitlistError, join_waitlist, leave_waitlist, position
 
 def appointment_list(request):
     """List available appointment slots"""
@@ -11,9 +32,278 @@ def book_appointment(request):
 
 def counselor_list(request):
     """List of available counselors"""
-    return render(request, 'booking_system/counselors.html')
+    counselors = filter_directory(
+        counselor_directory(),
+        language=request.GET.get('language'),
+        specialization=request.GET.get('specialization'),
+    )
+    return render(request, 'booking_system/counselors.html', {'counselors': counselors})
 
 @login_required
 def my_appointments(request):
     """User's booked appointments"""
     return render(request, 'booking_system/my_appointments.html')
+
+def _appointment_data(appointment):
+    return {
+        'id': appointment.pk,
+        'counselor_id': appointment.counselor_id,
+        'date': appointment.date.isoformat(),
+        'time': appointment.time.strftime('%H:%M'),
+        'status': appointment.status,
+    }
+
+@login_required
+@require_POST
+def book_slot_api(request):
+    """Book an available slot (API endpoint)"""
+    try:
+        data = json.loads(request.body)
+        slot_id = int(data['slot_id'])
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid booking request', 'status': 'error'}, status=400)
+    
+    try:
+        appointment = book_slot(request.user, slot_id, notes=str(data.get('notes', '')).strip())
+    except SlotClosed as e:
+        return JsonResponse({'error': str(e), 'status': 'gone'}, status=410)
+    except SlotUnavailable as e:
+        return JsonResponse({'error': str(e), 'status': 'conflict'}, status=409)
+    except BookingConflict as e:
+        response = JsonResponse({'error': str(e), 'status': 'error'}, status=503)
+        response['Retry-After'] = '1'
+        return response
+    
+    return JsonResponse({
+        'appointment': _appointment_data(appointment),
+        'message': 'Appointment booked successfully!',
+        'status': 'success'
+    }, status=201)
+
+@login_required
+@require_POST
+def cancel_appointment_api(request, appointment_id):
+    """Cancel one of the user's appointments (API endpoint)"""
+    appointment = get_object_or_404(Appointment, pk=appointment_id, student=request.user)
+    if not cancel_appointment(appointment):
+        return JsonResponse({'error': 'This appointment cannot be cancelled', 'status': 'error'}, status=409)
+    return JsonResponse({
+        'appointment': _appointment_data(appointment),
+        'message': 'Appointment cancelled.',
+        'status': 'success'
+    })
+
+def _waitlist_data(entry):
+    return {
+        'id': entry.pk,
+        'counselor_id': entry.counselor_id,
+        'date': entry.date.isoformat(),
+        'status': entry.status,
+        'position': position(entry) if entry.status == 'waiting' else None,
+    }
+
+@login_required
+@require_POST
+def join_waitlist_api(request):
+    """Wait for a slot with a counselor on a given day (API endpoint)"""
+    try:
+        data = json.loads(request.body)
+        counselor_id = int(data['counselor_id'])
+        day = date.fromisoformat(data['date'])
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid waitlist request', 'status': 'error'}, status=400)
+    
+    try:
+        entry = join_waitlist(request.user, counselor_id, day)
+    except WaitlistError as e:
+        return JsonResponse({'error': str(e), 'status': 'error'}, status=400)
+    
+    return JsonResponse({
+        'entry': _waitlist_data(entry),
+        'message': 'You are on the waitlist. We will book the first slot that frees up for you.',
+        'status': 'success'
+    }, status=201)
+
+@login_required
+@require_POST
+def leave_waitlist_api(request, entry_id):
+    """Leave a waitlist (API endpoint)"""
+    entry = get_object_or_404(WaitlistEntry, pk=entry_id, student=request.user)
+    if not leave_waitlist(entry):
+        return JsonResponse({'error': 'You are no longer on this waitlist', 'status': 'error'}, status=409)
+    return JsonResponse({'entry': _waitlist_data(entry), 'status': 'success'})
+
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+def availability_search_api(request):
+    """Search free appointment slots (API endpoint)"""
+    try:
+        start_date = _parse_date(request.GET.get('start'))
+        end_date = _parse_date(request.GET.get('end'))
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid search parameters', 'status': 'error'}, status=400)
+    
+    mode = request.GET.get('mode')
+    slots = availability_index.search(
+        start=datetime.combine(start_date, datetime.min.time()) if start_date else None,
+        # End date is inclusive
+        end=datetime.combine(end_date + timedelta(days=1), datetime.min.time()) if end_date else None,
+        language=request.GET.get('language'),
+        specialization=request.GET.get('specialization'),
+        institution=request.GET.get('institution'),
+        online={'online': True, 'offline': False}.get(mode),
+        limit=limit,
+    )
+    return JsonResponse({'slots': slots, 'status': 'success'})
+
+def _institution_id(value):
+    """Resolve an institution id or code; None for all institutions"""
+    from accounts.models import Institution
+
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    return Institution.objects.filter(code__iexact=value).values_list('pk', flat=True).first() or 0
+
+def counselor_directory_api(request):
+    """Counselors across institutions with their languages (API endpoint)"""
+    counselors = filter_directory(
+        counselor_directory(_institution_id(request.GET.get('institution'))),
+        language=request.GET.get('language'),
+        specialization=request.GET.get('specialization'),
+        available_only=request.GET.get('all') != '1',
+    )
+    return JsonResponse({'counselors': counselors, 'status': 'success'})
+
+def _calendar_response(request, appointments, name, show_counselor=False):
+    etag, last_modified = ical.feed_version(appointments)
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+    if response is None:
+        response = StreamingHttpResponse(
+            ical.generate_feed(appointments, name, show_counselor),
+            content_type='text/calendar; charset=utf-8',
+        )
+    response['ETag'] = etag
+    if last_modified_ts is not None:
+        response['Last-Modified'] = http_date(last_modified_ts)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def counselor_calendar(request, counselor_id):
+    """iCalendar feed of a counselor's appointments"""
+    counselor = get_object_or_404(Counselor.objects.select_related('user'), pk=counselor_id)
+    if not (ical.check_token('counselor', counselor.pk, request.GET.get('token'))
+            or request.user.is_staff or request.user.pk == counselor.user_id):
+        raise Http404
+    return _calendar_response(
+        request, ical.feed_queryset(counselor_id=counselor.pk), f'Appointments - {counselor.user.get_full_name()}'
+    )
+
+def institution_calendar(request, institution_id):
+    """iCalendar feed of all appointments with an institution's counselors"""
+    from accounts.models import Institution
+
+    institution = get_object_or_404(Institution, pk=institution_id)
+    if not (ical.check_token('institution', institution.pk, request.GET.get('token')) or request.user.is_staff):
+        raise Http404
+    return _calendar_response(
+        request, ical.feed_queryset(institution_id=institution.pk), f'Appointments - {institution.name}',
+        show_counselor=True,
+    )
+
+@login_required
+def calendar_links_api(request):
+    """Subscription URLs of the calendar feeds the user can read (API endpoint)"""
+    links = {}
+    counselor = Counselor.objects.filter(user=request.user).first()
+    if counselor is not None:
+        url = reverse('booking_system:counselor_calendar', args=[counselor.pk])
+        links['counselor'] = request.build_absolute_uri(
+            f"{url}?token={ical.feed_token('counselor', counselor.pk)}"
+        )
+    profile = getattr(request.user, 'counselor_profile', None)
+    if request.user.is_staff and profile is not None:
+        url = reverse('booking_system:institution_calendar', args=[profile.institution_id])
+        links['institution'] = request.build_absolute_uri(
+            f"{url}?token={ical.feed_token('institution', profile.institution_id)}"
+        )
+    return JsonResponse({'links': links, 'status': 'success'})
+
+@require_GET
+def booking_bootstrap_api(request):
+    """Counselors, free slots and the user's appointments in one payload (API endpoint)"""
+    try:
+        days = min(max(int(request.GET.get('days', 14)), 1), getattr(settings, 'BOOKING_HORIZON_DAYS', 28))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid number of days', 'status': 'error'}, status=400)
+    
+    availability_index.sync()
+    version = availability_index.version
+    etag = f'"{version}-{days}-{bootstrap.appointments_version(request.user)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        version, shared = bootstrap.shared_payload(days)
+        appointments = bootstrap.user_appointments(request.user, timezone.localdate())
+        response = HttpResponse(
+            bootstrap.build_payload(version, shared, appointments), content_type='application/json'
+        )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Seconds a change stream stays open; EventSource reconnects after it closes
+CHANGE_STREAM_SECONDS = 55
+# Under WSGI the whole response is buffered and would hold a worker, so each
+# request reports the current version at once and the client reconnects after
+# this many milliseconds
+CHANGE_WSGI_RETRY_MS = 30000
+CHANGE_POLL_SECONDS = 1
+CHANGE_KEEPALIVE_SECONDS = 15
+
+async def booking_changes_stream(request):
+    """
+    Server-sent 'changed' events whenever the free slots change.
+
+    Streaming needs ASGI; under WSGI Django buffers the response, so each
+    request answers straight away with at most one event and EventSource
+    reconnects after ``CHANGE_WSGI_RETRY_MS``. The change log is read from
+    the default cache, which must be shared between workers (see CACHES in
+    settings).
+    """
+    last = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    streaming = isinstance(request, ASGIRequest)
+    
+    def changed(version):
+        return f'id: {version}\nevent: changed\ndata: {json.dumps({"version": int(version)})}\n\n'
+    
+    async def poll():
+        yield f'retry: {CHANGE_WSGI_RETRY_MS}\n\n'
+        version = str(await cache.aget(SEQ_KEY, 0))
+        if version != last:
+            yield changed(version)
+    
+    async def events():
+        yield 'retry: 3000\n\n'
+        nonlocal last
+        deadline = time.monotonic() + CHANGE_STREAM_SECONDS
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline:
+            # One cache read per tick, whatever the number of slots
+            version = str(await cache.aget(SEQ_KEY, 0))
+            if version != last:
+                last = version
+                quiet_since = time.monotonic()
+                yield changed(version)
+            elif time.monotonic() - quiet_since >= CHANGE_KEEPALIVE_SECONDS:
+                quiet_since = time.monotonic()
+                yield ': keepalive\n\n'
+            await asyncio.sleep(CHANGE_POLL_SECONDS)
+    
+    response = StreamingHttpResponse(events() if streaming else poll(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
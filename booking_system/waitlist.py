@@ -0,0 +1,175 @@
+"""
+Per-counselor, per-day waitlists and reallocation of freed slots.
+
+Students join the waitlist for a counselor's day. Waiting entries are served
+in priority order (urgent first, then first come first served), which the
+``waitlist_queue_idx`` index returns directly. When a slot is released,
+``slot_released`` puts its id on a queue and returns, so cancelling stays fast.
+A background thread drains the queue and books each slot for the first
+student in line as a pending appointment that they can confirm or cancel.
+The entry is claimed with a conditional update in the same transaction as the
+booking, so a slot or entry is never handed out twice, even across processes.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Appointment, AvailableSlot, Counselor, WaitlistEntry
+from .services import ACTIVE_STATUSES, BookingError, SlotUnavailable, book_slot
+
+logger = logging.getLogger(__name__)
+
+# Waiting entries fetched per freed slot; later ones are only needed if the
+# first students already have another appointment at that time
+CANDIDATES_PER_SLOT = 20
+
+
+class WaitlistError(Exception):
+    """The student cannot join this waitlist"""
+
+
+def join_waitlist(student, counselor_id, day, priority=0):
+    """Add ``student`` to the waitlist for ``counselor_id`` on ``day`` and return the entry"""
+    if day < timezone.localdate():
+        raise WaitlistError('Cannot join the waitlist for a past date.')
+    if not Counselor.objects.filter(pk=counselor_id, is_available=True).exists():
+        raise WaitlistError('This counselor is not taking appointments.')
+    try:
+        with transaction.atomic():
+            entry = WaitlistEntry.objects.create(
+                student=student, counselor_id=counselor_id, date=day, priority=priority
+            )
+    except IntegrityError:
+        # Already waiting for this day
+        return WaitlistEntry.objects.get(
+            student=student, counselor_id=counselor_id, date=day, status='waiting'
+        )
+    # A slot may already be free, e.g. one released while nobody was waiting
+    reallocation_queue.put(*AvailableSlot.objects.filter(
+        counselor_id=counselor_id, date=day, is_booked=False
+    ).values_list('pk', flat=True))
+    return entry
+
+
+def leave_waitlist(entry):
+    """Withdraw a waiting entry; return False if it was no longer waiting"""
+    updated = WaitlistEntry.objects.filter(pk=entry.pk, status='waiting').update(
+        status='withdrawn', updated_at=timezone.now()
+    )
+    if updated:
+        entry.status = 'withdrawn'
+    return bool(updated)
+
+
+def position(entry):
+    """1-based place of a waiting entry in its queue"""
+    ahead = WaitlistEntry.objects.filter(
+        Q(priority__gt=entry.priority) | Q(priority=entry.priority, created_at__lt=entry.created_at),
+        counselor_id=entry.counselor_id, date=entry.date, status='waiting',
+    ).count()
+    return ahead + 1
+
+
+def reallocate(slot_id):
+    """Book a free slot for the first waiting student; return the Appointment or None"""
+    slot = AvailableSlot.objects.filter(pk=slot_id, is_booked=False).first()
+    if slot is None:
+        return None
+    now = timezone.localtime()
+    if slot.date < now.date() or (slot.date == now.date() and slot.start_time <= now.time()):
+        return None
+
+    busy = Appointment.objects.filter(
+        date=slot.date, time=slot.start_time, status__in=ACTIVE_STATUSES
+    ).values('student_id')
+    candidates = WaitlistEntry.objects.filter(
+        counselor_id=slot.counselor_id, date=slot.date, status='waiting'
+    ).exclude(student_id__in=busy).select_related('student')[:CANDIDATES_PER_SLOT]
+
+    for entry in candidates:
+        try:
+            with transaction.atomic():
+                claimed = WaitlistEntry.objects.filter(pk=entry.pk, status='waiting').update(
+                    status='booked', updated_at=timezone.now()
+                )
+                if not claimed:
+                    # Withdrawn or served by another worker meanwhile
+                    continue
+                appointment = book_slot(entry.student, slot.pk, notes='Booked from the waitlist')
+                WaitlistEntry.objects.filter(pk=entry.pk).update(appointment=appointment)
+                return appointment
+        except SlotUnavailable:
+            # Someone booked the slot directly; the entry claim was rolled back
+            return None
+        except BookingError:
+            logger.warning('Could not reallocate slot %s; the database is busy', slot_id)
+            return None
+    return None
+
+
+class ReallocationQueue:
+    """Reallocate released slots on a background thread"""
+
+    def __init__(self, batch_size=100):
+        self.batch_size = batch_size
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, *slot_ids):
+        if not slot_ids:
+            return
+        for slot_id in slot_ids:
+            self._queue.put(slot_id)
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='waitlist-reallocation', daemon=True)
+            self._thread.start()
+
+    def _drain(self, block=True):
+        slot_ids = []
+        try:
+            slot_ids.append(self._queue.get(block=block))
+            while len(slot_ids) < self.batch_size:
+                slot_ids.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return slot_ids
+
+    def _run(self):
+        while True:
+            slot_ids = self._drain()
+            try:
+                self.process(slot_ids)
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """Process everything still queued; used at shutdown"""
+        while True:
+            slot_ids = self._drain(block=False)
+            if not slot_ids:
+                return
+            self.process(slot_ids)
+
+    def process(self, slot_ids):
+        for slot_id in dict.fromkeys(slot_ids):
+            try:
+                reallocate(slot_id)
+            except DatabaseError:
+                logger.exception('Failed to reallocate slot %s', slot_id)
+
+
+reallocation_queue = ReallocationQueue()
+atexit.register(reallocation_queue.flush)
@@ -31,9 +31,39 @@ interface Message {
 interface ChatInterfaceProps {
   sessionId?: string;
   onEscalation?: () => void;
+  // Opt into the server-sent events endpoint so replies render as they arrive
+  streaming?: boolean;
+  streamUrl?: string;
 }
 
-const ChatInterface: React.FC<ChatInterfaceProps> = ({ sessionId, onEscalation }) => {
+interface StreamEvent {
+  event: string;
+  data: any;
+}
+
+// Split a buffered text/event-stream body into complete events, returning the unparsed remainder
+const parseEventStream = (buffer: string): [StreamEvent[], string] => {
+  const events: StreamEvent[] = [];
+  const blocks = buffer.split('\n\n');
+  const rest = blocks.pop() || '';
+  for (const block of blocks) {
+    let event = 'message';
+    let data = '';
+    for (const line of block.split('\n')) {
+      if (line.startsWith('event: ')) event = line.slice(7);
+      else if (line.startsWith('data: ')) data += line.slice(6);
+    }
+    events.push({ event, data: data ? JSON.parse(data) : null });
+  }
+  return [events, rest];
+};
+
+const ChatInterface: React.FC<ChatInterfaceProps> = ({
+  sessionId,
+  onEscalation,
+  streaming = false,
+  streamUrl = '/ai-support/api/stream-message/',
+}) => {
   const [messages, setMessages] = useState<Message[]>([
     {
       id: '1',
@@ -71,6 +101,11 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({ sessionId, onEscalation }
     setInputValue('');
     setIsLoading(true);
 
+    if (streaming) {
+      await streamReply(userMessage.content);
+      return;
+    }
+
     try {
       // Simulate API call to backend
       const response = await fetch('/api/chat/message', {
@@ -122,6 +157,70 @@ const ChatInterface: React.FC<ChatInterfaceProps> = ({ sessionId, onEscalation }
     }
   };
 
+  const streamReply = async (content: string) => {
+    const assistantId = (Date.now() + 1).toString();
+    const appendToken = (token: string) => {
+      setMessages(prev => prev.map(message => (
+        message.id === assistantId ? { ...message, content: message.content + token } : message
+      )));
+    };
+
+    try {
+      const response = await fetch(streamUrl, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Accept': 'text/event-stream',
+        },
+        credentials: 'same-origin',
+        body: JSON.stringify({ message: content }),
+      });
+
+      if (!response.ok || !response.body) {
+        throw new Error('Failed to send message');
+      }
+      if (!(response.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+        // Validation errors come back as a plain JSON body
+        const data = await response.json();
+        throw new Error(data.error || 'Failed to send message');
+      }
+
+      setMessages(prev => [...prev, {
+        id: assistantId,
+        role: 'assistant',
+        content: '',
+        timestamp: new Date(),
+      }]);
+      setIsLoading(false);
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const [events, rest] = parseEventStream(buffer);
+        buffer = rest;
+        for (const { event, data } of events) {
+          if (event === 'token') appendToken(data.token);
+        }
+      }
+    } catch (error) {
+      console.error('Error streaming message:', error);
+      setMessages(prev => [...prev.filter(message => message.id !== assistantId), {
+        id: assistantId,
+        role: 'assistant',
+        content: 'I apologize, but I\'m having trouble responding right now. Please try again or contact support if the issue persists.',
+        timestamp: new Date(),
+        sentiment: 'neutral',
+        riskLevel: 'low',
+      }]);
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
   const handleKeyPress = (event: React.KeyboardEvent) => {
     if (event.key === 'Enter' && !event.shiftKey) {
       event.preventDefault();
@@ -0,0 +1,114 @@
+"""
+Per-client rate limiting for JSON API views.
+
+Usage::
+
+    @csrf_exempt
+    @ratelimit('chat', rate='20/m')
+    def send_message(request):
+        ...
+
+Each client gets a bucket of ``limit`` requests that refills completely once
+per period. The bucket is a counter in the cache under a key that includes the
+current period, so a request costs a single atomic ``incr`` (plus an ``add``
+the first time a bucket is used). Periods are offset per client so buckets
+don't all refill at the same instant. Clients are identified by user id when
+logged in and by IP address otherwise. Rejected requests get a 429 with a
+``Retry-After`` header.
+
+``RATELIMIT_RATES`` in settings overrides the rate of a scope, and
+``RATELIMIT_ENABLED = False`` turns limiting off.
+"""
+import time
+import zlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Parse '20/m' or '100/5m' into ``(limit, period_seconds)``"""
+    limit, _, period = rate.partition('/')
+    multiplier = period[:-1] or '1'
+    return int(limit), int(multiplier) * UNITS[period[-1]]
+
+
+def _bucket(scope, ident, period, now):
+    """Return the cache key of the client's current bucket and seconds until it refills"""
+    offset = zlib.crc32(ident.encode()) % period
+    window, elapsed = divmod(int(now) + offset, period)
+    return f'ratelimit:{scope}:{ident}:{window}', period - elapsed
+
+
+def _ident(request, user):
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _too_many(retry_after):
+    response = JsonResponse({
+        'error': 'Too many requests. Please wait a moment and try again.',
+        'status': 'error'
+    }, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def _cache():
+    return caches[getattr(settings, 'RATELIMIT_CACHE', 'default')]
+
+
+def hit(key, period):
+    """Count one request against ``key`` and return the new total"""
+    cache = _cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, period + 1):
+            return 1
+        return cache.incr(key)
+
+
+async def ahit(key, period):
+    cache = _cache()
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        if await cache.aadd(key, 1, period + 1):
+            return 1
+        return await cache.aincr(key)
+
+
+def ratelimit(scope, rate):
+    """Limit each client to ``rate`` requests to the decorated view"""
+    limit, period = parse_rate(getattr(settings, 'RATELIMIT_RATES', {}).get(scope, rate))
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            async def _wrapped_view(request, *args, **kwargs):
+                if getattr(settings, 'RATELIMIT_ENABLED', True):
+                    user = await request.auser()
+                    key, retry_after = _bucket(scope, _ident(request, user), period, time.time())
+                    if await ahit(key, period) > limit:
+                        return _too_many(retry_after)
+                return await view_func(request, *args, **kwargs)
+
+            markcoroutinefunction(_wrapped_view)
+        else:
+            def _wrapped_view(request, *args, **kwargs):
+                if getattr(settings, 'RATELIMIT_ENABLED', True):
+                    user = getattr(request, 'user', None)
+                    key, retry_after = _bucket(scope, _ident(request, user), period, time.time())
+                    if hit(key, period) > limit:
+                        return _too_many(retry_after)
+                return view_func(request, *args, **kwargs)
+
+        return wraps(view_func)(_wrapped_view)
+
+    return decorator
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,6 +28,9 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# True under ``manage.py test``
+TESTING = sys.argv[1:2] == ['test']
+
 
 # Application definition
 
@@ -152,3 +156,95 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    # Must be shared by every worker process in production (e.g. Redis or
+    # Memcached): the booking availability change log and change stream, the
+    # coping strategy index, and the counselor directory are invalidated
+    # through version keys here. LocMemCache only suits a single process.
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Recent turns of active chat sessions (ai_support/context.py). LocMemCache
+    # evicts least recently used entries; use a shared backend such as Redis in
+    # production so every worker sees the same context.
+    'chat_context': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'chat-context',
+        'TIMEOUT': 30 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+# Number of turns kept per chat session in the chat_context cache
+CHAT_CONTEXT_TURNS = 10
+
+# Appointment slots generated from counselor availability (booking_system/slots.py)
+BOOKING_SLOT_MINUTES = 60
+BOOKING_HORIZON_DAYS = 28
+
+# Rate limiting for the JSON APIs (see mental_health_platform/ratelimit.py)
+RATELIMIT_ENABLED = True
+RATELIMIT_CACHE = 'default'
+RATELIMIT_RATES = {
+    'chat': '20/m',
+    'forum_post': '5/m',
+}
+
+# AI support chat persistence
+# Chat turns are buffered in memory and written with bulk_create once either
+# limit is reached (see ai_support/persistence.py). Under tests they are
+# written straight away instead.
+CHAT_BUFFER_MAX_SIZE = 50
+CHAT_BUFFER_FLUSH_INTERVAL = 2.0  # seconds
+
+# AI support reply generation (see ai_support/generators.py)
+CHAT_RESPONSE_GENERATOR = {
+    'BACKEND': 'ai_support.generators.KeywordResponseGenerator',
+    'OPTIONS': {},
+}
+
+# Offline support ticket assignment (see accounts/routing.py)
+TICKET_ROUTING = {
+    'AUTO_ASSIGN': True,
+    'MAX_OPEN_TICKETS': 10,
+    'MAX_SCHEDULED_HOURS': 30,
+    'HOURS_WEIGHT': 0.5,
+    'REFRESH_SECONDS': 300,
+}
+
+# Forum full-text search (see peer_support/search.py). Without this setting
+# the backend matching the database is used: SQLite FTS5 or PostgreSQL
+# full-text search.
+# FORUM_SEARCH = {
+#     'BACKEND': 'peer_support.search.PostgresSearchBackend',
+#     'OPTIONS': {'config': 'english'},
+# }
+
+# Forum moderation (see peer_support/moderation.py). Items left pending by a
+# stopped process are checked by `manage.py moderate_forum`.
+FORUM_MODERATION = {
+    'ASYNC': True,
+    'WORKERS': 2,
+    'BATCH_SIZE': 50,
+    'REVIEW_THRESHOLD': 0.3,  # flag for the moderator queue
+    'HOLD_THRESHOLD': 0.8,  # also hide until reviewed
+}
+
+# Appointment and offline ticket reminders (see booking_system/reminders.py),
+# sent by `manage.py send_reminders [--loop]`
+REMINDERS = {
+    'OFFSETS': [24 * 60, 60],  # minutes before the start
+    'LOOKBACK_MINUTES': 15,
+    'BATCH_SIZE': 500,
+    'SENDER': {
+        'BACKEND': 'booking_system.reminders.ConsoleSender',
+        'OPTIONS': {},
+    },
+}
@@ -19,11 +19,11 @@ class ForumCategoryAdmin(admin.ModelAdmin):
 
 @admin.register(ForumPost)
 class ForumPostAdmin(admin.ModelAdmin):
-    list_display = ['title', 'author', 'category', 'is_anonymous', 'is_moderated', 'created_at']
-    list_filter = ['category', 'is_anonymous', 'is_moderated', 'created_at']
+    list_display = ['title', 'author', 'category', 'reply_count', 'last_activity_at', 'is_anonymous', 'moderation_status', 'risk_score', 'is_moderated', 'created_at']
+    list_filter = ['category', 'is_anonymous', 'moderation_status', 'is_moderated', 'created_at']
     search_fields = ['title', 'content', 'author__username']
     list_editable = ['is_moderated']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['risk_score', 'moderation_reasons', 'moderated_at', 'created_at', 'updated_at']
     date_hierarchy = 'created_at'
     inlines = [ForumReplyInline]
     fieldsets = [
@@ -33,6 +33,9 @@ class ForumPostAdmin(admin.ModelAdmin):
         ('Settings', {
             'fields': ['is_anonymous', 'is_moderated']
         }),
+        ('Moderation', {
+            'fields': ['moderation_status', 'risk_score', 'moderation_reasons', 'moderated_at']
+        }),
         ('Timestamps', {
             'fields': ['created_at', 'updated_at'],
             'classes': ['collapse']
@@ -42,8 +45,8 @@ class ForumPostAdmin(admin.ModelAdmin):
 
 @admin.register(ForumReply)
 class ForumReplyAdmin(admin.ModelAdmin):
-    list_display = ['post', 'author', 'content_preview', 'is_anonymous', 'is_moderated', 'created_at']
-    list_filter = ['is_anonymous', 'is_moderated', 'created_at']
+    list_display = ['post', 'author', 'content_preview', 'is_anonymous', 'moderation_status', 'risk_score', 'is_moderated', 'created_at']
+    list_filter = ['is_anonymous', 'moderation_status', 'is_moderated', 'created_at']
     search_fields = ['content', 'author__username', 'post__title']
     list_editable = ['is_moderated']
     readonly_fields = ['created_at']
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PeerSupportConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'peer_support'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,80 @@
+"""
+Denormalized reply counters on ForumPost.
+
+``reply_count`` and ``last_activity_at`` (null until the first reply) cover
+the visible replies of a post (``is_moderated=False``), so forum listings
+show "N replies, last reply X ago" straight from the post rows they already
+read, without counting replies per post. Saves and deletes of replies adjust
+them, and the post's ``hot_score`` (peer_support/ranking.py), through
+signals with single ``F()`` updates, which stay correct under concurrent
+replies.
+
+Writes that bypass signals (``bulk_create``, ``QuerySet.update``, raw SQL)
+leave the counters stale; ``manage.py repair_forum_counters`` recomputes
+them from one aggregate query.
+"""
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from . import ranking
+from .models import ForumPost, ForumReply
+
+
+def reply_added(reply):
+    ForumPost.objects.filter(pk=reply.post_id).update(
+        reply_count=F('reply_count') + 1,
+        # GREATEST() is NULL on SQLite and MySQL when either side is
+        last_activity_at=Coalesce(
+            Greatest(F('last_activity_at'), Value(reply.created_at)), Value(reply.created_at)
+        ),
+        hot_score=ranking.add_activity(reply.created_at),
+    )
+
+
+def reply_removed(reply):
+    """Account for a reply that was deleted or hidden by a moderator"""
+    latest = ForumReply.objects.filter(
+        post=OuterRef('pk'), is_moderated=False
+    ).exclude(pk=reply.pk).order_by('-created_at').values('created_at')[:1]
+    # A removed term can't be subtracted from hot_score reliably; rescore the thread
+    created_at = ForumPost.objects.filter(pk=reply.post_id).values_list('created_at', flat=True).first()
+    if created_at is None:
+        return
+    reply_times = ForumReply.objects.filter(post_id=reply.post_id, is_moderated=False).exclude(
+        pk=reply.pk
+    ).values_list('created_at', flat=True)
+    ForumPost.objects.filter(pk=reply.post_id).update(
+        reply_count=Greatest(F('reply_count') - 1, Value(0)),
+        last_activity_at=Subquery(latest),
+        hot_score=ranking.thread_score(created_at, reply_times),
+    )
+
+
+def stale_counters():
+    """Yield ``(post_id, reply_count, last_activity_at)`` for every post whose counters are wrong"""
+    visible = Q(replies__is_moderated=False)
+    rows = ForumPost.objects.order_by().annotate(
+        actual_count=Count('replies', filter=visible),
+        actual_last=Max('replies__created_at', filter=visible),
+    ).values_list('pk', 'reply_count', 'last_activity_at', 'actual_count', 'actual_last')
+    for pk, count, last, actual_count, actual_last in rows.iterator(chunk_size=2000):
+        if count != actual_count or last != actual_last:
+            yield pk, actual_count, actual_last
+
+
+def repair_counters(batch_size=1000, dry_run=False):
+    """Recompute stale counters; return how many posts were fixed"""
+    fixed = 0
+    batch = []
+    for pk, count, last in stale_counters():
+        batch.append(ForumPost(pk=pk, reply_count=count, last_activity_at=last))
+        if len(batch) >= batch_size:
+            fixed += len(batch)
+            if not dry_run:
+                ForumPost.objects.bulk_update(batch, ['reply_count', 'last_activity_at'])
+            batch = []
+    if batch:
+        fixed += len(batch)
+        if not dry_run:
+            ForumPost.objects.bulk_update(batch, ['reply_count', 'last_activity_at'])
+    return fixed
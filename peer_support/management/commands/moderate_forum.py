@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from peer_support.moderation import moderate, moderation_setting, pending_batches
+
+
+class Command(BaseCommand):
+    help = 'Run moderation checks on forum posts and replies that are still pending'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=moderation_setting('BATCH_SIZE'),
+            help='Items checked and updated per batch',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        approved = flagged = 0
+        for keys in pending_batches(options['batch_size']):
+            batch_approved, batch_flagged = moderate(keys)
+            approved += batch_approved
+            flagged += batch_flagged
+        self.stdout.write(self.style.SUCCESS(f'Approved {approved} and flagged {flagged} posts and replies'))
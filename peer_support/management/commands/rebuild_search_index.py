@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from peer_support.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of forum posts and replies'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if backend is None:
+            raise CommandError('No forum search backend for this database; set FORUM_SEARCH in settings')
+        backend.create()
+        indexed = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} posts and replies'))
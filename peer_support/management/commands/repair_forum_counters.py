@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from peer_support.counters import repair_counters
+from peer_support.ranking import repair_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized reply_count, last_activity_at and hot_score of forum posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Posts updated per query (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many posts have stale counters or scores',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        fixed = repair_counters(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        rescored = repair_scores(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{fixed} posts have stale reply counters and {rescored} stale hot scores')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Repaired reply counters of {fixed} posts and hot scores of {rescored} posts'
+            ))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peer_support', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='forumpost',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='forumreply',
+            options={'ordering': ['created_at', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['-created_at', '-id'], name='forumpost_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='forumpost_category_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumreply',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='forumreply_post_idx'),
+        ),
+    ]
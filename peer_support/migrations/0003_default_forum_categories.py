@@ -0,0 +1,26 @@
+from django.db import migrations
+
+# The categories offered by the new post form
+DEFAULT_CATEGORIES = [
+    ('Discussion', 'General conversation about student life and wellbeing'),
+    ('Support', 'Ask for and offer emotional support'),
+    ('Resource Share', 'Apps, books, techniques and services that helped you'),
+    ('Advice Request', 'Ask the community for practical advice'),
+]
+
+
+def create_categories(apps, schema_editor):
+    ForumCategory = apps.get_model('peer_support', 'ForumCategory')
+    for name, description in DEFAULT_CATEGORIES:
+        ForumCategory.objects.get_or_create(name=name, defaults={'description': description})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peer_support', '0002_forum_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_categories, migrations.RunPython.noop),
+    ]
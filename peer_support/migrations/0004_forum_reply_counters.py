@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:33
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    ForumPost = apps.get_model('peer_support', 'ForumPost')
+    ForumReply = apps.get_model('peer_support', 'ForumReply')
+    visible = ForumReply.objects.filter(post=OuterRef('pk'), is_moderated=False).order_by()
+    ForumPost.objects.update(
+        reply_count=Coalesce(Subquery(
+            visible.values('post').annotate(n=Count('pk')).values('n'), output_field=IntegerField()
+        ), 0),
+        last_activity_at=Subquery(visible.order_by('-created_at').values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peer_support', '0003_default_forum_categories'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Latest visible reply', null=True),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='forumreply',
+            name='is_moderated',
+            field=models.BooleanField(default=False, help_text='Hidden by a moderator'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from peer_support.search import search_backend
+
+    backend = search_backend(schema_editor.connection.alias)
+    if backend is not None:
+        backend.create()
+        backend.rebuild()
+
+
+def drop_search_index(apps, schema_editor):
+    from peer_support.search import search_backend
+
+    backend = search_backend(schema_editor.connection.alias)
+    if backend is not None:
+        backend.drop()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peer_support', '0004_forum_reply_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peer_support', '0005_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='moderated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='moderation_reasons',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='moderation_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('flagged', 'Flagged for review'), ('removed', 'Removed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='risk_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='forumreply',
+            name='moderated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='forumreply',
+            name='moderation_reasons',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='forumreply',
+            name='moderation_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('flagged', 'Flagged for review'), ('removed', 'Removed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='forumreply',
+            name='risk_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AlterField(
+            model_name='forumpost',
+            name='is_moderated',
+            field=models.BooleanField(default=False, help_text='Hidden by moderation'),
+        ),
+        migrations.AlterField(
+            model_name='forumreply',
+            name='is_moderated',
+            field=models.BooleanField(default=False, help_text='Hidden by moderation'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['moderation_status', '-risk_score'], name='forumpost_moderation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumreply',
+            index=models.Index(fields=['moderation_status', '-risk_score'], name='forumreply_moderation_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def score_posts(apps, schema_editor):
+    from peer_support.ranking import thread_score
+
+    ForumPost = apps.get_model('peer_support', 'ForumPost')
+    ForumReply = apps.get_model('peer_support', 'ForumReply')
+    reply_times = {}
+    for post_id, created_at in ForumReply.objects.filter(is_moderated=False).values_list('post_id', 'created_at').iterator():
+        reply_times.setdefault(post_id, []).append(created_at)
+    posts = [
+        ForumPost(pk=pk, hot_score=thread_score(created_at, reply_times.get(pk, [])))
+        for pk, created_at in ForumPost.objects.values_list('pk', 'created_at').iterator()
+    ]
+    ForumPost.objects.bulk_update(posts, ['hot_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peer_support', '0006_forum_moderation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='hot_score',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['-hot_score', '-id'], name='forumpost_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(fields=['category', '-hot_score', '-id'], name='forumpost_category_hot_idx'),
+        ),
+        migrations.RunPython(score_posts, migrations.RunPython.noop),
+    ]
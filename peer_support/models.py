@@ -12,18 +12,43 @@ class ForumCategory(models.Model):
     def __str__(self):
         return self.name
 
+MODERATION_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('approved', 'Approved'),
+    ('flagged', 'Flagged for review'),
+    ('removed', 'Removed'),
+]
+
 class ForumPost(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.ForeignKey(ForumCategory, on_delete=models.CASCADE)
     is_anonymous = models.BooleanField(default=True, help_text="Hide author identity")
-    is_moderated = models.BooleanField(default=False)
+    is_moderated = models.BooleanField(default=False, help_text="Hidden by moderation")
+    # Set by peer_support/moderation.py
+    moderation_status = models.CharField(max_length=20, choices=MODERATION_STATUS_CHOICES, default='pending')
+    risk_score = models.FloatField(default=0.0)
+    moderation_reasons = models.CharField(max_length=255, blank=True)
+    moderated_at = models.DateTimeField(null=True, blank=True)
+    # Denormalized from the visible replies, see peer_support/counters.py
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+    last_activity_at = models.DateTimeField(null=True, blank=True, editable=False, help_text="Latest visible reply")
+    # Time-independent "hot" ordering key, see peer_support/ranking.py
+    hot_score = models.FloatField(default=0.0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Keyset pagination on (created_at, id), see peer_support/pagination.py
+            models.Index(fields=['-created_at', '-id'], name='forumpost_recent_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='forumpost_category_recent_idx'),
+            models.Index(fields=['-hot_score', '-id'], name='forumpost_hot_idx'),
+            models.Index(fields=['category', '-hot_score', '-id'], name='forumpost_category_hot_idx'),
+            models.Index(fields=['moderation_status', '-risk_score'], name='forumpost_moderation_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -33,11 +58,19 @@ class ForumReply(models.Model):
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     is_anonymous = models.BooleanField(default=True)
-    is_moderated = models.BooleanField(default=False)
+    is_moderated = models.BooleanField(default=False, help_text="Hidden by moderation")
+    moderation_status = models.CharField(max_length=20, choices=MODERATION_STATUS_CHOICES, default='pending')
+    risk_score = models.FloatField(default=0.0)
+    moderation_reasons = models.CharField(max_length=255, blank=True)
+    moderated_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['created_at']
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='forumreply_post_idx'),
+            models.Index(fields=['moderation_status', '-risk_score'], name='forumreply_moderation_idx'),
+        ]
     
     def __str__(self):
         return f"Reply to {self.post.title}"
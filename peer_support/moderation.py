@@ -0,0 +1,426 @@
+"""
+Automatic moderation of forum posts and replies.
+
+New posts and replies are visible straight away and put on a queue once
+their transaction commits; creating them never waits for moderation. A pool
+of background threads drains the queue in batches and runs the configured
+checks (crisis language, profanity and abuse, spam) on every item. Check
+scores in [0, 1] are combined into a risk score as independent
+probabilities, 1 - prod(1 - score):
+
+- below ``REVIEW_THRESHOLD`` the item is approved;
+- from ``REVIEW_THRESHOLD`` it is flagged for the moderator queue, which
+  lists flagged items by risk;
+- from ``HOLD_THRESHOLD`` it is also hidden (``is_moderated``) until a
+  moderator approves it.
+
+Crisis language is the exception: such an item is always flagged but never
+hidden, whatever else it scores. Its crisis alert is raised by the view that
+created it (peer_support/views.py), so each post counts once in the crisis
+metrics.
+
+Approved and flagged-but-visible items of a batch are written with one
+``bulk_update`` per model. Hidden items are saved one by one so the reply
+counters and the search index follow through their signals; they are rare.
+
+The queue lives in memory, so items queued by a process that stops are
+left ``pending``; ``manage.py moderate_forum`` checks them (and content from
+before moderation existed). Checks are configured like::
+
+    FORUM_MODERATION = {
+        'CHECKS': [
+            {'BACKEND': 'peer_support.moderation.SpamCheck', 'OPTIONS': {'max_links': 1}},
+        ],
+    }
+"""
+import atexit
+import json
+import logging
+import math
+import queue
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ai_support.crisis import detect_crisis
+from ai_support.intents import compile_keywords, normalize
+
+logger = logging.getLogger(__name__)
+
+MODERATION_DATA_FILE = Path(__file__).resolve().parent / 'data' / 'moderation.json'
+
+DEFAULTS = {
+    'ASYNC': True,
+    'WORKERS': 2,
+    'BATCH_SIZE': 50,
+    'REVIEW_THRESHOLD': 0.3,
+    'HOLD_THRESHOLD': 0.8,
+    'CHECKS': [
+        {'BACKEND': 'peer_support.moderation.CrisisCheck', 'OPTIONS': {}},
+        {'BACKEND': 'peer_support.moderation.ProfanityCheck', 'OPTIONS': {}},
+        {'BACKEND': 'peer_support.moderation.SpamCheck', 'OPTIONS': {}},
+    ],
+}
+
+# Fields written by moderation
+FIELDS = ['moderation_status', 'risk_score', 'moderation_reasons', 'moderated_at', 'is_moderated']
+
+
+def moderation_setting(name):
+    return getattr(settings, 'FORUM_MODERATION', {}).get(name, DEFAULTS[name])
+
+
+@dataclass
+class ModerationItem:
+    kind: str  # 'post' or 'reply'
+    pk: int
+    author_id: int
+    text: str
+    obj: object = None
+    # Set by CrisisCheck; the item is then never hidden
+    crisis_phrase: str = None
+
+
+# Checks
+
+class ModerationCheck:
+    """Base class for moderation checks"""
+
+    def check(self, item):
+        """Return ``(score, reason)``: a risk score in [0, 1] and a short reason, or None"""
+        raise NotImplementedError
+
+
+class CrisisCheck(ModerationCheck):
+    """
+    Crisis language (ai_support.crisis). The author needs help, not to be
+    silenced: ``moderate`` flags such items but never hides them, even when
+    other checks push the risk over the hold threshold.
+    """
+
+    def __init__(self, score=0.7):
+        self.score = score
+
+    def check(self, item):
+        phrase = detect_crisis(item.text)
+        if phrase:
+            item.crisis_phrase = phrase
+            return self.score, f'crisis language "{phrase}"'
+        return 0.0, None
+
+
+class ProfanityCheck(ModerationCheck):
+    """Profanity, and abuse aimed at other students, from ``peer_support/data/moderation.json``"""
+
+    def __init__(self, profanity=None, abuse=None, profanity_score=0.35, abuse_score=0.9):
+        with open(MODERATION_DATA_FILE, encoding='utf-8') as fh:
+            data = json.load(fh)
+        self.profanity = compile_keywords(profanity or data['profanity'])
+        self.abuse = compile_keywords(abuse or data['abuse'])
+        self.profanity_score = profanity_score
+        self.abuse_score = abuse_score
+
+    def check(self, item):
+        text = normalize(item.text)
+        abuse = self.abuse.search(text)
+        if abuse:
+            return self.abuse_score, f'abusive language "{abuse.group(0)}"'
+        words = {match.group(0).lower() for match in self.profanity.finditer(text)}
+        if words:
+            return min(len(words) * self.profanity_score, 1.0), f'profanity ({len(words)})'
+        return 0.0, None
+
+
+class SpamCheck(ModerationCheck):
+    """Links, shouting, and the same text posted again by the same author"""
+
+    LINK_PATTERN = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+    def __init__(self, max_links=2, link_score=0.3, duplicate_minutes=60, duplicate_score=0.6,
+                 duplicate_min_length=40):
+        self.max_links = max_links
+        self.link_score = link_score
+        self.duplicate_minutes = duplicate_minutes
+        self.duplicate_score = duplicate_score
+        # Short replies such as "Thank you!" are repeated legitimately
+        self.duplicate_min_length = duplicate_min_length
+
+    def _duplicate(self, item):
+        from .models import ForumPost, ForumReply
+
+        model = ForumPost if item.kind == 'post' else ForumReply
+        return model.objects.filter(
+            author_id=item.author_id,
+            content=item.obj.content,
+            created_at__gte=timezone.now() - timedelta(minutes=self.duplicate_minutes),
+        ).exclude(pk=item.pk).exists()
+
+    def check(self, item):
+        scores, reasons = [], []
+        links = len(self.LINK_PATTERN.findall(item.text))
+        if links > self.max_links:
+            scores.append(min((links - self.max_links) * self.link_score, 1.0))
+            reasons.append(f'{links} links')
+        letters = [ch for ch in item.text if ch.isalpha()]
+        if len(letters) >= 30 and sum(ch.isupper() for ch in letters) > 0.7 * len(letters):
+            scores.append(0.2)
+            reasons.append('shouting')
+        if (item.obj is not None and len(item.obj.content) >= self.duplicate_min_length
+                and self._duplicate(item)):
+            scores.append(self.duplicate_score)
+            reasons.append('repeated post')
+        return combine(scores), ', '.join(reasons) or None
+
+
+def combine(scores):
+    return 1 - math.prod(1 - min(max(score, 0.0), 1.0) for score in scores)
+
+
+@lru_cache(maxsize=None)
+def get_checks():
+    """Return the configured moderation checks"""
+    return tuple(
+        import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+        for config in moderation_setting('CHECKS')
+    )
+
+
+def assess(item, checks=None):
+    """Return ``(risk, reasons)`` for an item"""
+    scores, reasons = [], []
+    for check in checks or get_checks():
+        try:
+            score, reason = check.check(item)
+        except Exception:
+            logger.exception('Moderation check %s failed on %s %s', type(check).__name__, item.kind, item.pk)
+            continue
+        scores.append(score)
+        if reason:
+            reasons.append(reason)
+    return combine(scores), '; '.join(reasons)
+
+
+# Moderating
+
+def _items(kind, objs):
+    for obj in objs:
+        text = f'{obj.title}\n{obj.content}' if kind == 'post' else obj.content
+        yield ModerationItem(kind, obj.pk, obj.author_id, text, obj)
+
+
+def moderate(keys):
+    """Moderate the pending posts and replies among ``(kind, pk)`` keys; return ``(approved, flagged)``"""
+    from .models import ForumPost, ForumReply
+
+    review = moderation_setting('REVIEW_THRESHOLD')
+    hold = moderation_setting('HOLD_THRESHOLD')
+    approved = flagged = 0
+    for kind, model in (('post', ForumPost), ('reply', ForumReply)):
+        pks = {pk for key_kind, pk in keys if key_kind == kind}
+        if not pks:
+            continue
+        now = timezone.now()
+        batch = []
+        for item in _items(kind, model.objects.filter(pk__in=pks, moderation_status='pending')):
+            obj = item.obj
+            obj.risk_score, obj.moderation_reasons = assess(item)
+            obj.moderation_reasons = obj.moderation_reasons[:255]
+            obj.moderated_at = now
+            if obj.risk_score >= review or item.crisis_phrase:
+                obj.moderation_status = 'flagged'
+                flagged += 1
+            else:
+                obj.moderation_status = 'approved'
+                approved += 1
+            if obj.risk_score >= hold and not item.crisis_phrase:
+                obj.is_moderated = True
+                obj.save(update_fields=FIELDS)
+            else:
+                batch.append(obj)
+        model.objects.bulk_update(batch, FIELDS)
+    return approved, flagged
+
+
+def pending_batches(batch_size):
+    """Yield batches of ``(kind, pk)`` keys of pending posts and replies, oldest first"""
+    from .models import ForumPost, ForumReply
+
+    for kind, model in (('post', ForumPost), ('reply', ForumReply)):
+        last = 0
+        while True:
+            pks = list(
+                model.objects.filter(moderation_status='pending', pk__gt=last)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            last = pks[-1]
+            yield [(kind, pk) for pk in pks]
+
+
+def apply_decision(obj, action):
+    """Apply a moderator's decision ('approve' or 'remove') to a post or reply"""
+    obj.moderation_status = 'approved' if action == 'approve' else 'removed'
+    obj.is_moderated = action != 'approve'
+    obj.moderated_at = timezone.now()
+    obj.save(update_fields=FIELDS)
+
+
+# Queue
+
+@dataclass
+class QueuedItem:
+    kind: str
+    pk: int
+    queued_at: float
+
+
+class ModerationMetrics:
+    """Counters and recent latencies of a moderation queue"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.processed = 0
+        self.flagged = 0
+        self.failed = 0
+        self.in_flight = 0
+
+    def started(self, n):
+        with self._lock:
+            self.in_flight += n
+
+    def finished(self, items, flagged=0, failed=False):
+        done = time.monotonic()
+        with self._lock:
+            self.in_flight -= len(items)
+            if failed:
+                self.failed += len(items)
+                return
+            self.processed += len(items)
+            self.flagged += flagged
+            self._latencies.extend(done - item.queued_at for item in items)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'processed': self.processed,
+                'flagged': self.flagged,
+                'failed': self.failed,
+                'in_flight': self.in_flight,
+            }
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000, 1)
+
+        stats['latency_ms'] = {'p50': percentile(0.5), 'p95': percentile(0.95), 'max': percentile(1.0)}
+        return stats
+
+
+class ModerationQueue:
+    """Moderate new posts and replies on a pool of background threads"""
+
+    def __init__(self, workers=2, batch_size=50):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.metrics = ModerationMetrics()
+        self._queue = queue.SimpleQueue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def put(self, kind, pk):
+        self._queue.put(QueuedItem(kind, pk, time.monotonic()))
+        self._ensure_workers()
+
+    def backlog(self):
+        return self._queue.qsize()
+
+    def _ensure_workers(self):
+        if len(self._threads) == self.workers and all(thread.is_alive() for thread in self._threads):
+            return
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run, name=f'forum-moderation-{len(self._threads)}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _drain(self, block=True):
+        items = []
+        try:
+            items.append(self._queue.get(block=block))
+            while len(items) < self.batch_size:
+                items.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+
+    def _run(self):
+        while True:
+            items = self._drain()
+            try:
+                self.process(items)
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """Process everything still queued; used at shutdown"""
+        while True:
+            items = self._drain(block=False)
+            if not items:
+                return
+            self.process(items)
+
+    def process(self, items):
+        self.metrics.started(len(items))
+        try:
+            _, flagged = moderate([(item.kind, item.pk) for item in items])
+        except DatabaseError:
+            # Left pending for manage.py moderate_forum
+            logger.exception('Failed to moderate %d forum items', len(items))
+            self.metrics.finished(items, failed=True)
+        else:
+            self.metrics.finished(items, flagged)
+
+
+moderation_queue = ModerationQueue(
+    workers=moderation_setting('WORKERS'), batch_size=moderation_setting('BATCH_SIZE')
+)
+atexit.register(moderation_queue.flush)
+
+
+def moderation_metrics():
+    """Queue metrics of this process plus the pending backlog in the database"""
+    from .models import ForumPost, ForumReply
+
+    now = timezone.now()
+    database = {}
+    for kind, model in (('posts', ForumPost), ('replies', ForumReply)):
+        state = model.objects.filter(moderation_status='pending').aggregate(
+            count=Count('pk'), oldest=Min('created_at')
+        )
+        database[kind] = {
+            'pending': state['count'],
+            'oldest_pending_seconds': round((now - state['oldest']).total_seconds(), 1) if state['oldest'] else 0.0,
+            'flagged': model.objects.filter(moderation_status='flagged').count(),
+        }
+    return {
+        'queue': {'backlog': moderation_queue.backlog(), **moderation_queue.metrics.snapshot()},
+        'database': database,
+    }
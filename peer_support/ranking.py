@@ -0,0 +1,88 @@
+"""
+"Hot" ordering of forum threads.
+
+A thread's heat is its activity (the post and each visible reply) with every
+event decaying by half each ``FORUM_HOT_HALF_LIFE_HOURS``: many recent
+replies make a thread hot, old ones fade. Compared at any one moment, that
+ordering is the same as ordering by
+
+    hot_score = ln(sum(exp(k * (t - EPOCH)) for each event time t)),  k = ln 2 / half-life
+
+which doesn't depend on the current time. So ``ForumPost.hot_score`` is
+stored once and never needs refreshing as time passes: the hot listing is a
+range scan of the ``(-hot_score, -id)`` index. A new reply adds its term
+with one ``F()`` update of its own thread (see counters.reply_added); a
+removed reply rescores that thread only. ``manage.py repair_forum_counters``
+recomputes every score, e.g. after changing the half-life.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+
+# Scores grow by ~1.4 per half-life after this date, so floats keep plenty
+# of precision for centuries
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def half_life_hours():
+    return getattr(settings, 'FORUM_HOT_HALF_LIFE_HOURS', 12)
+
+
+def activity(when):
+    """Score of a single event at ``when``"""
+    return (when - EPOCH).total_seconds() * math.log(2) / (half_life_hours() * 3600)
+
+
+def thread_score(created_at, reply_times):
+    """Score of a post created at ``created_at`` with visible replies at ``reply_times``"""
+    terms = [activity(created_at)] + [activity(when) for when in reply_times]
+    top = max(terms)
+    return top + math.log(sum(math.exp(term - top) for term in terms))
+
+
+def add_activity(when):
+    """Expression for ``hot_score`` with an event at ``when`` added, ln(e^a + e^b) computed stably"""
+    term = Value(activity(when), output_field=FloatField())
+    return Greatest(F('hot_score'), term) + Ln(Value(1.0) + Exp(-Abs(F('hot_score') - term)))
+
+
+def stale_scores(tolerance=1e-6):
+    """Yield ``(post_id, hot_score)`` for every post whose stored score is wrong"""
+    from .models import ForumPost, ForumReply
+
+    # Merge two streams ordered by post id, so memory stays flat
+    replies = ForumReply.objects.filter(is_moderated=False).order_by('post_id', 'created_at').values_list(
+        'post_id', 'created_at'
+    ).iterator(chunk_size=5000)
+    reply = next(replies, None)
+    posts = ForumPost.objects.order_by('pk').values_list('pk', 'created_at', 'hot_score').iterator(chunk_size=2000)
+    for pk, created_at, stored in posts:
+        times = []
+        while reply is not None and reply[0] <= pk:
+            if reply[0] == pk:
+                times.append(reply[1])
+            reply = next(replies, None)
+        score = thread_score(created_at, times)
+        if abs(score - stored) > tolerance:
+            yield pk, score
+
+
+def repair_scores(batch_size=1000, dry_run=False):
+    """Recompute stale hot scores; return how many posts were fixed"""
+    from .models import ForumPost
+
+    fixed = 0
+    batch = []
+    for pk, score in stale_scores():
+        batch.append(ForumPost(pk=pk, hot_score=score))
+        fixed += 1
+        if len(batch) >= batch_size:
+            if not dry_run:
+                ForumPost.objects.bulk_update(batch, ['hot_score'])
+            batch = []
+    if batch and not dry_run:
+        ForumPost.objects.bulk_update(batch, ['hot_score'])
+    return fixed
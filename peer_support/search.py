@@ -0,0 +1,273 @@
+"""
+Full-text search over forum posts and replies.
+
+Visible posts and replies are copied into a search table that the database
+indexes for full-text queries: an FTS5 virtual table on SQLite and a table
+with a weighted, stored ``tsvector`` column and a GIN index on PostgreSQL.
+Searches are index lookups ranked by BM25 (SQLite) or ``ts_rank``
+(PostgreSQL), with the title weighted above the body, and return highlighted
+snippets. They never scan the forum tables.
+
+Both posts and replies are keyed by ``pk * 2`` (posts) and ``pk * 2 + 1``
+(replies), so keeping the index in sync touches single rows. Signals
+(peer_support/signals.py) update it in the transaction of the forum write;
+rows are always copied with ``INSERT ... SELECT`` so hidden content
+(``is_moderated``) and replies to hidden posts are never indexed. Writes that
+bypass signals are picked up by ``manage.py rebuild_search_index``.
+
+The backend is chosen for the database vendor unless configured::
+
+    FORUM_SEARCH = {
+        'BACKEND': 'peer_support.search.PostgresSearchBackend',
+        'OPTIONS': {'config': 'simple'},
+    }
+"""
+import html
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+TABLE = 'peer_support_search'
+MAX_TERMS = 10
+# Markers put around matches by the database; the snippet is HTML-escaped
+# before they are turned into <mark> tags
+START, STOP = '\x02', '\x03'
+
+VENDOR_BACKENDS = {
+    'sqlite': 'peer_support.search.SQLiteFTSBackend',
+    'postgresql': 'peer_support.search.PostgresSearchBackend',
+}
+
+# Text search configurations for LANGUAGE_CODE. PostgreSQL has no stemmers
+# for the Indian languages the platform supports; 'simple' still matches
+# whole words in any script.
+POSTGRES_CONFIGS = {
+    'en': 'english', 'fr': 'french', 'de': 'german', 'es': 'spanish',
+    'pt': 'portuguese', 'it': 'italian', 'nl': 'dutch',
+}
+
+
+@dataclass
+class SearchHit:
+    kind: str  # 'post' or 'reply'
+    object_id: int
+    post_id: int
+    snippet: str
+    rank: float
+
+
+def _highlight(snippet):
+    text = html.escape(snippet or '')
+    return mark_safe(text.replace(START, '<mark>').replace(STOP, '</mark>'))
+
+
+def search_terms(query):
+    """Split a user query into at most ``MAX_TERMS`` words, dropping bare punctuation"""
+    terms = [term for term in query.replace('"', ' ').split() if any(ch.isalnum() for ch in term)]
+    return terms[:MAX_TERMS]
+
+
+class SearchBackend:
+    """Base class for forum search backends"""
+
+    key_column = 'id'
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def _execute(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    # Schema
+
+    def create(self):
+        raise NotImplementedError
+
+    def drop(self):
+        self._execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    # Indexing
+
+    def _copy_posts(self, condition, params=()):
+        from .models import ForumPost
+
+        return self._execute(
+            f'INSERT INTO {TABLE} ({self.key_column}, post_id, title, content) '
+            f'SELECT p.id * 2, p.id, p.title, p.content FROM {ForumPost._meta.db_table} p '
+            f'WHERE NOT p.is_moderated AND {condition}',
+            params,
+        )
+
+    def _copy_replies(self, condition, params=()):
+        from .models import ForumPost, ForumReply
+
+        return self._execute(
+            f'INSERT INTO {TABLE} ({self.key_column}, post_id, title, content) '
+            f"SELECT r.id * 2 + 1, r.post_id, '', r.content FROM {ForumReply._meta.db_table} r "
+            f'JOIN {ForumPost._meta.db_table} p ON p.id = r.post_id '
+            f'WHERE NOT r.is_moderated AND NOT p.is_moderated AND {condition}',
+            params,
+        )
+
+    def _remove(self, key):
+        self._execute(f'DELETE FROM {TABLE} WHERE {self.key_column} = %s', [key])
+
+    def index_post(self, post_id):
+        """(Re)index a post, not its replies"""
+        self._remove(post_id * 2)
+        self._copy_posts('p.id = %s', [post_id])
+
+    def index_reply(self, reply_id):
+        self._remove(reply_id * 2 + 1)
+        self._copy_replies('r.id = %s', [reply_id])
+
+    def remove_post(self, post_id):
+        self._remove(post_id * 2)
+
+    def remove_reply(self, reply_id):
+        self._remove(reply_id * 2 + 1)
+
+    def index_thread(self, post_id):
+        """(Re)index a post and all its replies, e.g. after the post was hidden or shown"""
+        from .models import ForumReply
+
+        for reply_id in ForumReply.objects.filter(post_id=post_id).values_list('pk', flat=True).iterator():
+            self._remove(reply_id * 2 + 1)
+        self.index_post(post_id)
+        self._copy_replies('r.post_id = %s', [post_id])
+
+    def rebuild(self):
+        """Reindex everything; return the number of indexed posts and replies"""
+        self._execute(f'DELETE FROM {TABLE}')
+        return self._copy_posts('1 = 1') + self._copy_replies('1 = 1')
+
+    # Searching
+
+    def _search(self, terms, limit, offset):
+        """Return ``(key, post_id, snippet, rank)`` rows, best first"""
+        raise NotImplementedError
+
+    def search(self, query, limit=20, offset=0):
+        """Return the best matching posts and replies as SearchHits"""
+        terms = search_terms(query)
+        if not terms:
+            return []
+        return [
+            SearchHit(
+                kind='reply' if key % 2 else 'post',
+                object_id=key // 2,
+                post_id=post_id,
+                snippet=_highlight(snippet),
+                rank=rank,
+            )
+            for key, post_id, snippet, rank in self._search(terms, limit, offset)
+        ]
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    SQLite FTS5 with the ``unicode61`` tokenizer, which splits words in any
+    script, folds case and strips Latin diacritics, wrapped in the Porter
+    stemmer for English (which leaves other scripts alone).
+    """
+
+    key_column = 'rowid'
+
+    def __init__(self, using='default', tokenize='porter unicode61 remove_diacritics 2',
+                 title_weight=10.0, snippet_words=16):
+        super().__init__(using)
+        self.tokenize = tokenize
+        self.title_weight = title_weight
+        self.snippet_words = snippet_words
+
+    def create(self):
+        tokenize = self.tokenize.replace("'", "''")
+        self._execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} '
+            f"USING fts5(post_id UNINDEXED, title, content, tokenize = '{tokenize}')"
+        )
+
+    def _search(self, terms, limit, offset):
+        # Quoted strings keep FTS5 query syntax out of user input; the last
+        # word also matches as a prefix so partial words find results
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, post_id, snippet({TABLE}, 2, %s, %s, %s, %s), '
+                f'bm25({TABLE}, 0.0, %s, 1.0) AS score '
+                f'FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY score LIMIT %s OFFSET %s',
+                [START, STOP, '…', self.snippet_words, self.title_weight, match, limit, offset],
+            )
+            # bm25() is lower for better matches
+            return [(key, post_id, snippet, -score) for key, post_id, snippet, score in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    PostgreSQL full-text search on a stored ``tsvector`` (title weighted A,
+    body B) with a GIN index, using the text search configuration for
+    LANGUAGE_CODE unless ``config`` is given.
+    """
+
+    def __init__(self, using='default', config=None, snippet_words=24):
+        super().__init__(using)
+        language = settings.LANGUAGE_CODE.split('-')[0]
+        self.config = config or POSTGRES_CONFIGS.get(language, 'simple')
+        if not re.fullmatch(r'[a-z_]+', self.config):
+            raise ImproperlyConfigured(f'Invalid text search configuration: {self.config!r}')
+        self.snippet_words = snippet_words
+
+    def create(self):
+        config = f"'{self.config}'::regconfig"
+        self._execute(
+            f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+            'id bigint PRIMARY KEY, post_id bigint NOT NULL, title text NOT NULL, content text NOT NULL, '
+            f"document tsvector GENERATED ALWAYS AS (setweight(to_tsvector({config}, title), 'A') "
+            f"|| setweight(to_tsvector({config}, content), 'B')) STORED)"
+        )
+        self._execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING GIN (document)')
+
+    def _search(self, terms, limit, offset):
+        options = (f'StartSel={START}, StopSel={STOP}, MaxFragments=1, '
+                   f'MaxWords={self.snippet_words}, MinWords={self.snippet_words // 3}')
+        with self.connection.cursor() as cursor:
+            # Headlines are built for the returned page only
+            cursor.execute(
+                f'SELECT s.id, s.post_id, ts_headline(%s::regconfig, s.title || %s || s.content, hit.query, %s), '
+                f'hit.score FROM ('
+                f'  SELECT id, query, ts_rank(document, query) AS score '
+                f'  FROM {TABLE}, websearch_to_tsquery(%s::regconfig, %s) query '
+                f'  WHERE document @@ query ORDER BY score DESC LIMIT %s OFFSET %s'
+                f') hit JOIN {TABLE} s ON s.id = hit.id ORDER BY hit.score DESC',
+                [self.config, ' \n ', options, self.config, ' '.join(terms), limit, offset],
+            )
+            return cursor.fetchall()
+
+
+def search_backend(using='default'):
+    """Return the configured backend, or the one for the database vendor; None if there is none"""
+    config = getattr(settings, 'FORUM_SEARCH', None)
+    if config is None:
+        path = VENDOR_BACKENDS.get(connections[using].vendor)
+        if path is None:
+            return None
+        config = {'BACKEND': path}
+    return import_string(config['BACKEND'])(using=using, **config.get('OPTIONS', {}))
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    """Return the search backend of the default database, or None if search is not available"""
+    return search_backend()
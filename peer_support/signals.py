@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, ranking
+from .models import ForumPost, ForumReply
+from .moderation import moderation_queue, moderation_setting
+from .search import get_backend
+
+
+@receiver(pre_save, sender=ForumPost)
+def score_new_post(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        # created_at is only set once saving starts; the difference is far below
+        # the tolerance of ranking.stale_scores
+        instance.hot_score = ranking.activity(instance.created_at or timezone.now())
+
+
+@receiver(post_init, sender=ForumReply)
+def remember_reply_state(sender, instance, **kwargs):
+    instance._was_visible = instance.pk is not None and not instance.is_moderated
+
+
+@receiver(post_save, sender=ForumReply)
+def update_reply_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    visible = not instance.is_moderated
+    was_visible = False if created else instance._was_visible
+    if visible and not was_visible:
+        counters.reply_added(instance)
+    elif was_visible and not visible:
+        counters.reply_removed(instance)
+    instance._was_visible = visible
+
+
+@receiver(post_delete, sender=ForumReply)
+def release_reply_counters(sender, instance, **kwargs):
+    if instance._was_visible:
+        counters.reply_removed(instance)
+
+
+# Search index, see peer_support/search.py
+
+@receiver(post_init, sender=ForumPost)
+def remember_post_state(sender, instance, **kwargs):
+    instance._was_visible = instance.pk is not None and not instance.is_moderated
+
+
+@receiver(post_save, sender=ForumPost)
+def index_post(sender, instance, created, raw=False, **kwargs):
+    backend = get_backend()
+    if raw or backend is None:
+        return
+    visible = not instance.is_moderated
+    if not created and visible != instance._was_visible:
+        backend.index_thread(instance.pk)
+    elif visible:
+        backend.index_post(instance.pk)
+    instance._was_visible = visible
+
+
+@receiver(post_delete, sender=ForumPost)
+def unindex_post(sender, instance, **kwargs):
+    backend = get_backend()
+    if backend is not None:
+        backend.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=ForumReply)
+def index_reply(sender, instance, created, raw=False, **kwargs):
+    backend = get_backend()
+    if raw or backend is None:
+        return
+    if not instance.is_moderated:
+        backend.index_reply(instance.pk)
+    elif not created:
+        backend.remove_reply(instance.pk)
+
+
+@receiver(post_delete, sender=ForumReply)
+def unindex_reply(sender, instance, **kwargs):
+    backend = get_backend()
+    if backend is not None:
+        backend.remove_reply(instance.pk)
+
+
+# Moderation, see peer_support/moderation.py
+
+@receiver(post_save, sender=ForumPost)
+@receiver(post_save, sender=ForumReply)
+def queue_for_moderation(sender, instance, created, raw=False, **kwargs):
+    if raw or not created or instance.moderation_status != 'pending' or not moderation_setting('ASYNC'):
+        return
+    kind = 'post' if sender is ForumPost else 'reply'
+    transaction.on_commit(lambda: moderation_queue.put(kind, instance.pk))
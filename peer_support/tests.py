@@ -1,3 +1,59 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from .models import ForumCategory, ForumPost, ForumReply
+from .moderation import moderate, moderation_setting
+
+
+@override_settings(FORUM_MODERATION={'ASYNC': False})
+class ModerationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student')
+        category = ForumCategory.objects.create(name='Test', description='')
+        cls.post = ForumPost.objects.create(title='Exams', content='Any tips?', author=cls.user, category=category)
+
+    def _reply(self, content):
+        return ForumReply.objects.create(post=self.post, content=content, author=self.user)
+
+    @mock.patch('ai_support.crisis.crisis_queue')
+    def test_crisis_language_is_flagged_but_never_hidden(self, crisis_queue):
+        # Crisis (0.7) and one swear word (0.35) combine to over the hold threshold
+        reply = self._reply('I want to die, this shit never ends')
+        moderate([('reply', reply.pk)])
+        reply.refresh_from_db()
+        self.assertGreaterEqual(reply.risk_score, moderation_setting('HOLD_THRESHOLD'))
+        self.assertEqual(reply.moderation_status, 'flagged')
+        self.assertFalse(reply.is_moderated)
+        # The view that created the reply raised the alert already
+        crisis_queue.put.assert_not_called()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.reply_count, 1)
+
+    def test_abuse_is_hidden(self):
+        reply = self._reply('kys, nobody cares about you')
+        moderate([('reply', reply.pk)])
+        reply.refresh_from_db()
+        self.assertEqual(reply.moderation_status, 'flagged')
+        self.assertTrue(reply.is_moderated)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.reply_count, 0)
+
+    def test_supportive_reply_is_approved(self):
+        for content in ('Take a long nap after the exam, you deserve it!',
+                        'You are not an attention seeker for asking for help'):
+            reply = self._reply(content)
+            moderate([('reply', reply.pk)])
+            reply.refresh_from_db()
+            self.assertEqual(reply.moderation_status, 'approved', content)
+            self.assertFalse(reply.is_moderated)
+
+    def test_clean_reply_is_approved(self):
+        reply = self._reply('Breathing exercises helped me a lot')
+        self.assertEqual(moderate([('reply', reply.pk)]), (1, 0))
+        reply.refresh_from_db()
+        self.assertEqual(reply.moderation_status, 'approved')
+        self.assertFalse(reply.is_moderated)
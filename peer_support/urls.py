@@ -6,6 +6,14 @@ urlpatterns = [
     path('category/<int:category_id>/', views.forum_category, name='category'),
     path('post/<int:post_id>/', views.view_post, name='view_post'),
     path('new-post/', views.create_post, name='create_post'),
+    path('search/', views.search, name='search'),
+    path('api/search/', views.search_api, name='search_api'),
+    path('moderation/', views.moderation_queue, name='moderation_queue'),
+    path('api/moderation/metrics/', views.moderation_metrics_api, name='moderation_metrics_api'),
+    path('api/moderation/<str:kind>/<int:pk>/', views.moderation_action_api, name='moderation_action_api'),
+    path('api/posts/', views.posts_api, name='posts_api'),
+    path('api/posts/<int:post_id>/replies/', views.replies_api, name='replies_api'),
     path('api/create-post/', views.create_post_api, name='create_post_api'),
+    path('api/posts/<int:post_id>/reply/', views.create_reply_api, name='create_reply_api'),
     path('volunteers/', views.volunteer_list, name='volunteers'),
 ]
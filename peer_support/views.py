@@ -1,23 +1,219 @@
-from django.shortcuts import render, redirect
+import heapq
+
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
 import json
 
+from mental_health_platform.ratelimit import ratelimit
+from ai_support.crisis import crisis_response, detect_crisis, report_crisis
+
+from .models import ForumCategory, ForumPost, ForumReply
+from .moderation import apply_decision, moderation_metrics
+from .pagination import InvalidCursor, keyset_page, page_size
+from .search import get_backend
+
+# Ranked search results can't be paged by key; keep offsets shallow
+MAX_SEARCH_OFFSET = 200
+MODERATION_QUEUE_LIMIT = 100
+# Listing orders: 'new' by creation, 'hot' by peer_support/ranking.py
+SORT_FIELDS = {'new': 'created_at', 'hot': 'hot_score'}
+
+def _author_name(obj):
+    if obj.is_anonymous:
+        return 'Anonymous Student'
+    return obj.author.get_full_name() or obj.author.username
+
+def _post_data(post):
+    return {
+        'id': post.pk,
+        'title': post.title,
+        'content': post.content,
+        'author': _author_name(post),
+        'category': {'id': post.category_id, 'name': post.category.name},
+        'reply_count': post.reply_count,
+        'last_activity_at': post.last_activity_at.isoformat() if post.last_activity_at else None,
+        'created_at': post.created_at.isoformat(),
+    }
+
+def _reply_data(reply):
+    return {
+        'id': reply.pk,
+        'content': reply.content,
+        'author': _author_name(reply),
+        'created_at': reply.created_at.isoformat(),
+    }
+
+def _posts(category=None):
+    posts = ForumPost.objects.filter(is_moderated=False).select_related('author', 'category')
+    if category is not None:
+        posts = posts.filter(category=category)
+    return posts
+
+def _sort(request):
+    sort = request.GET.get('sort')
+    return sort if sort in SORT_FIELDS else 'new'
+
+def _forum_page(request, category=None):
+    sort = _sort(request)
+    try:
+        posts, next_cursor = keyset_page(
+            _posts(category), request.GET.get('cursor'), page_size(request.GET.get('limit')),
+            field=SORT_FIELDS[sort],
+        )
+    except InvalidCursor:
+        raise Http404('Invalid page')
+    for post in posts:
+        post.author_name = _author_name(post)
+    return render(request, 'peer_support/forum.html', {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'sort': sort,
+        'category': category,
+        'categories': ForumCategory.objects.filter(is_active=True).order_by('name'),
+    })
+
 def forum_home(request):
     """Forum homepage"""
-    return render(request, 'peer_support/forum.html')
+    return _forum_page(request)
 
 def forum_category(request, category_id):
     """Posts in a specific category"""
-    return render(request, 'peer_support/category.html', {'category_id': category_id})
+    category = get_object_or_404(ForumCategory, pk=category_id, is_active=True)
+    return _forum_page(request, category)
 
 def view_post(request, post_id):
     """View a forum post and replies"""
-    return render(request, 'peer_support/post.html', {'post_id': post_id})
+    post = get_object_or_404(ForumPost.objects.select_related('author', 'category'), pk=post_id)
+    if post.is_moderated and not request.user.is_staff:
+        raise Http404('Post not found')
+    post.author_name = _author_name(post)
+    try:
+        replies, next_cursor = keyset_page(
+            post.replies.filter(is_moderated=False).select_related('author'), request.GET.get('cursor'),
+            page_size(request.GET.get('limit'), default=50), newest_first=False,
+        )
+    except InvalidCursor:
+        raise Http404('Invalid page')
+    for reply in replies:
+        reply.author_name = _author_name(reply)
+    return render(request, 'peer_support/post.html', {
+        'post': post,
+        'replies': replies,
+        'next_cursor': next_cursor,
+    })
+
+@require_GET
+def posts_api(request):
+    """Newest or hottest (?sort=hot) posts, one keyset page at a time (API endpoint)"""
+    category = request.GET.get('category')
+    posts = _posts()
+    if category:
+        if not category.isdigit():
+            return JsonResponse({'error': 'Invalid category', 'status': 'error'}, status=400)
+        posts = posts.filter(category_id=int(category))
+    try:
+        page, next_cursor = keyset_page(
+            posts, request.GET.get('cursor'), page_size(request.GET.get('limit')), field=SORT_FIELDS[_sort(request)]
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor', 'status': 'error'}, status=400)
+    return JsonResponse({
+        'posts': [_post_data(post) for post in page],
+        'next_cursor': next_cursor,
+        'status': 'success'
+    })
+
+@require_GET
+def replies_api(request, post_id):
+    """Replies to a post, oldest first, one keyset page at a time (API endpoint)"""
+    if not ForumPost.objects.filter(pk=post_id, is_moderated=False).exists():
+        return JsonResponse({'error': 'Post not found', 'status': 'error'}, status=404)
+    try:
+        page, next_cursor = keyset_page(
+            ForumReply.objects.filter(post_id=post_id, is_moderated=False).select_related('author'),
+            request.GET.get('cursor'), page_size(request.GET.get('limit'), default=50), newest_first=False,
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor', 'status': 'error'}, status=400)
+    return JsonResponse({
+        'replies': [_reply_data(reply) for reply in page],
+        'next_cursor': next_cursor,
+        'status': 'success'
+    })
+
+def _search(query, limit, offset):
+    """Search hits for ``query`` with their (visible) posts attached"""
+    hits = get_backend().search(query, limit=limit, offset=offset)
+    posts = ForumPost.objects.filter(is_moderated=False).select_related('category').in_bulk(
+        {hit.post_id for hit in hits}
+    )
+    results = []
+    for hit in hits:
+        hit.post = posts.get(hit.post_id)
+        if hit.post is not None:
+            results.append(hit)
+    return results
+
+def _search_params(request):
+    query = request.GET.get('q', '').strip()[:200]
+    limit = page_size(request.GET.get('limit'))
+    try:
+        offset = min(max(int(request.GET.get('offset', 0)), 0), MAX_SEARCH_OFFSET)
+    except ValueError:
+        offset = 0
+    return query, limit, offset
+
+def search(request):
+    """Search forum posts and replies"""
+    query, limit, offset = _search_params(request)
+    available = get_backend() is not None
+    results = _search(query, limit + 1, offset) if query and available else []
+    more = len(results) > limit and offset + limit <= MAX_SEARCH_OFFSET
+    return render(request, 'peer_support/search.html', {
+        'query': query,
+        'results': results[:limit],
+        'search_available': available,
+        'previous_offset': max(offset - limit, 0) if offset else None,
+        'next_offset': offset + limit if more else None,
+    })
+
+@require_GET
+def search_api(request):
+    """Ranked full-text search over posts and replies (API endpoint)"""
+    if get_backend() is None:
+        return JsonResponse({'error': 'Search is not available', 'status': 'error'}, status=503)
+    query, limit, offset = _search_params(request)
+    if not query:
+        return JsonResponse({'error': 'Search query is required', 'status': 'error'}, status=400)
+    return JsonResponse({
+        'results': [{
+            'type': hit.kind,
+            'id': hit.object_id,
+            'post': {'id': hit.post.pk, 'title': hit.post.title, 'category': hit.post.category.name},
+            'snippet': hit.snippet,
+            'rank': round(hit.rank, 4),
+        } for hit in _search(query, limit, offset)],
+        'status': 'success'
+    })
 
-@csrf_exempt
+def _resolve_category(value):
+    """Find an active category by id or by (the start of) its name, e.g. 'resource'"""
+    categories = ForumCategory.objects.filter(is_active=True)
+    value = str(value or '').strip()
+    if value.isdigit():
+        return categories.filter(pk=int(value)).first()
+    if not value:
+        return None
+    return (categories.filter(name__iexact=value).first()
+            or categories.filter(name__istartswith=value).order_by('name').first())
+
+@ratelimit('forum_post', rate='5/m')
 def create_post_api(request):
     """API endpoint for creating forum posts"""
     if request.method == 'POST':
@@ -25,21 +221,43 @@ def create_post_api(request):
             data = json.loads(request.body)
             title = data.get('title', '').strip()
             content = data.get('content', '').strip()
-            category = data.get('category', 'discussion')
+            category = _resolve_category(data.get('category', 'discussion'))
             
             if not title or not content:
                 return JsonResponse({
                     'error': 'Title and content are required',
                     'status': 'error'
                 })
+            if not request.user.is_authenticated:
+                return JsonResponse({
+                    'error': 'Please log in to post',
+                    'status': 'error'
+                }, status=401)
+            if category is None:
+                return JsonResponse({
+                    'error': 'Unknown category',
+                    'status': 'error'
+                })
             
-            # Here you would normally save to database
-            # For now, we'll simulate a successful post creation
+            post = ForumPost.objects.create(
+                title=title[:200],
+                content=content,
+                author=request.user,
+                category=category,
+                is_anonymous=bool(data.get('anonymous', True)),
+            )
             
-            return JsonResponse({
+            result = {
+                'post': _post_data(post),
                 'message': 'Post created successfully!',
                 'status': 'success'
-            })
+            }
+            phrase = detect_crisis(f'{title}\n{content}')
+            if phrase:
+                report_crisis('forum post', post.pk, phrase, request.user)
+                result['support_message'] = crisis_response()
+            
+            return JsonResponse(result)
             
         except json.JSONDecodeError:
             return JsonResponse({
@@ -54,6 +272,81 @@ def create_post_api(request):
     
     return JsonResponse({'error': 'Invalid request method', 'status': 'error'})
 
+@ratelimit('forum_post', rate='5/m')
+def create_reply_api(request, post_id):
+    """API endpoint for replying to a forum post"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method', 'status': 'error'})
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Please log in to reply', 'status': 'error'}, status=401)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid data format', 'status': 'error'})
+    
+    content = str(data.get('content', '')).strip()
+    if not content:
+        return JsonResponse({'error': 'Please enter a reply', 'status': 'error'})
+    post = get_object_or_404(ForumPost, pk=post_id, is_moderated=False)
+    with transaction.atomic():
+        # The post's reply counters are updated in the same transaction
+        reply = ForumReply.objects.create(
+            post=post,
+            content=content,
+            author=request.user,
+            is_anonymous=bool(data.get('anonymous', True)),
+        )
+    
+    result = {
+        'reply': _reply_data(reply),
+        'message': 'Reply posted!',
+        'status': 'success'
+    }
+    phrase = detect_crisis(content)
+    if phrase:
+        report_crisis('forum reply', reply.pk, phrase, request.user)
+        result['support_message'] = crisis_response()
+    return JsonResponse(result)
+
+@staff_member_required
+def moderation_queue(request):
+    """Flagged posts and replies for moderators, highest risk first"""
+    order = ('-risk_score', 'pk')
+    posts = ForumPost.objects.filter(moderation_status='flagged').select_related('author', 'category').order_by(*order)
+    replies = ForumReply.objects.filter(moderation_status='flagged').select_related('author', 'post').order_by(*order)
+    items = heapq.merge(
+        [(obj, 'post') for obj in posts[:MODERATION_QUEUE_LIMIT]],
+        [(obj, 'reply') for obj in replies[:MODERATION_QUEUE_LIMIT]],
+        key=lambda entry: -entry[0].risk_score,
+    )
+    return render(request, 'peer_support/moderation.html', {
+        'items': list(items)[:MODERATION_QUEUE_LIMIT],
+        'metrics': moderation_metrics(),
+    })
+
+@staff_member_required
+@require_POST
+def moderation_action_api(request, kind, pk):
+    """Approve or remove a flagged post or reply (API endpoint)"""
+    model = {'post': ForumPost, 'reply': ForumReply}.get(kind)
+    if model is None:
+        return JsonResponse({'error': 'Unknown content type', 'status': 'error'}, status=404)
+    try:
+        action = json.loads(request.body).get('action')
+    except (json.JSONDecodeError, AttributeError):
+        action = None
+    if action not in ('approve', 'remove'):
+        return JsonResponse({'error': 'Action must be approve or remove', 'status': 'error'}, status=400)
+    obj = get_object_or_404(model, pk=pk)
+    apply_decision(obj, action)
+    return JsonResponse({'moderation_status': obj.moderation_status, 'status': 'success'})
+
+@staff_member_required
+@require_GET
+def moderation_metrics_api(request):
+    """Moderation backlog and latency (API endpoint)"""
+    return JsonResponse({**moderation_metrics(), 'status': 'success'})
+
 @login_required
 def create_post(request):
     """Create a new forum post"""
@@ -7,6 +7,7 @@ document.addEventListener('DOMContentLoaded', function() {
         selectedCounselor: null,
         selectedDate: null,
         selectedTime: null,
+        selectedSlotId: null,
         sessionDuration: '50min',
         sessionType: 'video',
         formData: {}
@@ -53,6 +54,165 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 3000);
     }
 
+    // Server data
+    // Counselors, free slots and the user's appointments come from one
+    // bootstrap request. The browser revalidates it with its ETag, and it is
+    // only refetched when the change stream reports that slots changed.
+    const bookingCard = document.querySelector('.booking-main-card');
+    const bookingUrls = {
+        bootstrap: (bookingCard && bookingCard.dataset.bootstrapUrl) || '/booking/api/bootstrap/',
+        changes: (bookingCard && bookingCard.dataset.changesUrl) || '/booking/api/changes/',
+        book: (bookingCard && bookingCard.dataset.bookUrl) || '/booking/api/book/'
+    };
+    let bookingData = null;
+    let changeStream = null;
+
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value == null ? '' : String(value);
+        // innerHTML leaves quotes alone; escape them for attribute values
+        return div.innerHTML.replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+    }
+
+    function getCookie(name) {
+        const match = document.cookie.match(new RegExp('(?:^|; )' + name + '=([^;]*)'));
+        return match ? decodeURIComponent(match[1]) : null;
+    }
+
+    function toObjects(fields, rows) {
+        return rows.map(row => Object.fromEntries(fields.map((field, i) => [field, row[i]])));
+    }
+
+    async function loadBookingData() {
+        try {
+            const response = await fetch(bookingUrls.bootstrap, { credentials: 'same-origin' });
+            if (!response.ok) {
+                throw new Error(`Bootstrap request failed with ${response.status}`);
+            }
+            const payload = await response.json();
+            const slots = {};
+            Object.entries(payload.data.slots).forEach(([counselorId, rows]) => {
+                slots[counselorId] = toObjects(payload.data.slot_fields, rows);
+            });
+            bookingData = {
+                version: payload.version,
+                counselors: toObjects(payload.data.counselor_fields, payload.data.counselors),
+                slots: slots,
+                appointments: toObjects(payload.appointment_fields, payload.appointments)
+            };
+            renderCounselors();
+            renderTimeSlots();
+            markAvailableDays();
+        } catch (error) {
+            console.error('Could not load booking data:', error);
+        }
+    }
+
+    function watchChanges() {
+        if (!window.EventSource || changeStream) return;
+        changeStream = new EventSource(bookingUrls.changes);
+        changeStream.addEventListener('changed', event => {
+            const { version } = JSON.parse(event.data);
+            if (bookingData && version !== bookingData.version) {
+                loadBookingData();
+            }
+        });
+    }
+
+    function counselorSlots() {
+        if (!bookingData || !bookingSystem.selectedCounselor) return [];
+        return bookingData.slots[bookingSystem.selectedCounselor.id] || [];
+    }
+
+    function renderCounselors() {
+        const grid = document.querySelector('.counselors-grid');
+        if (!grid || !bookingData || !bookingData.counselors.length) return;
+        
+        grid.innerHTML = bookingData.counselors.map(counselor => {
+            const freeSlots = (bookingData.slots[counselor.id] || []).length;
+            const selected = bookingSystem.selectedCounselor && String(bookingSystem.selectedCounselor.id) === String(counselor.id);
+            return `
+                <div class="counselor-card${selected ? ' selected' : ''}" data-counselor-id="${counselor.id}">
+                    <div class="counselor-avatar">
+                        <div class="availability-indicator ${freeSlots ? 'available' : 'busy'}"></div>
+                    </div>
+                    <div class="counselor-info">
+                        <h6>${escapeHtml(counselor.name)}</h6>
+                        <span class="counselor-title">${escapeHtml(counselor.specialization)}</span>
+                        <div class="counselor-stats">
+                            <div class="stat">
+                                <i class="bi bi-clock"></i>
+                                <span>${freeSlots} open slots</span>
+                            </div>
+                        </div>
+                        <div class="languages">
+                            <small><i class="bi bi-translate"></i> ${escapeHtml(counselor.languages.join(', ').toUpperCase())}</small>
+                        </div>
+                    </div>
+                </div>
+            `;
+        }).join('');
+    }
+
+    function markAvailableDays() {
+        const days = new Set(counselorSlots().map(slot => slot.date));
+        document.querySelectorAll('#calendar-grid .calendar-day[data-date]').forEach(day => {
+            day.classList.toggle('has-slots', days.has(day.dataset.date));
+        });
+    }
+
+    function formatTime(time) {
+        const [hours, minutes] = time.split(':').map(Number);
+        return new Date(2000, 0, 1, hours, minutes).toLocaleTimeString('en-US', { hour: 'numeric', minute: '2-digit' });
+    }
+
+    function renderTimeSlots() {
+        const grid = document.querySelector('.time-slots-grid');
+        if (!grid || !bookingData || !bookingSystem.selectedCounselor) return;
+        
+        const slots = counselorSlots().filter(slot => slot.date === bookingSystem.selectedDate);
+        if (bookingSystem.selectedSlotId && !slots.some(slot => slot.slot_id === bookingSystem.selectedSlotId)) {
+            // The selected slot was just booked by someone else
+            bookingSystem.selectedSlotId = null;
+            bookingSystem.selectedTime = null;
+            if (bookingSystem.currentStep === 2) {
+                showErrorMessage('That time was just taken. Please pick another one.');
+            }
+            updateNavigationButtons();
+            updateSummary();
+        }
+        if (!slots.length) {
+            grid.innerHTML = `<p class="text-muted">${bookingSystem.selectedDate ? 'No free times on this day.' : 'Select a date to see free times.'}</p>`;
+            return;
+        }
+        
+        const periods = [['Morning', 0, 12], ['Afternoon', 12, 17], ['Evening', 17, 24]];
+        grid.innerHTML = periods.map(([title, from, to]) => {
+            const inPeriod = slots.filter(slot => {
+                const hour = Number(slot.time.slice(0, 2));
+                return hour >= from && hour < to;
+            });
+            if (!inPeriod.length) return '';
+            return `
+                <div class="time-period">
+                    <h6 class="period-title">${title}</h6>
+                    <div class="time-slots">
+                        ${inPeriod.map(slot => `
+                            <div class="time-slot available${slot.slot_id === bookingSystem.selectedSlotId ? ' selected' : ''}" data-time="${slot.time}" data-slot-id="${slot.slot_id}">
+                                <span class="time">${formatTime(slot.time)}</span>
+                                <span class="status">${slot.online ? 'Online' : 'Available'}</span>
+                            </div>
+                        `).join('')}
+                    </div>
+                </div>
+            `;
+        }).join('');
+    }
+
+    function saveState() {
+        localStorage.setItem('bookingFormData', JSON.stringify(bookingSystem));
+    }
+
     // Step navigation
     function updateProgressBar() {
         const steps = document.querySelectorAll('.progress-step');
@@ -152,6 +312,7 @@ document.addEventListener('DOMContentLoaded', function() {
         } catch (error) {
             console.error('Error populating confirmation details:', error);
         }
+    }
 
     function updateNavigationButtons() {
         const prevBtn = document.querySelector('.btn-prev');
@@ -266,61 +427,68 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Counselor selection
     function initializeCounselorSelection() {
-        const counselorCards = document.querySelectorAll('.counselor-card');
-        console.log('Found counselor cards:', counselorCards.length);
-        counselorCards.forEach(card => {
-            card.addEventListener('click', function(e) {
-                e.preventDefault();
+        const grid = document.querySelector('.counselors-grid');
+        if (!grid) return;
+        // Delegated, so cards rendered from server data work too
+        grid.addEventListener('click', function(e) {
+            const card = e.target.closest('.counselor-card');
+            if (!card) return;
+            e.preventDefault();
+            
+            try {
+                // Remove previous selection
+                grid.querySelectorAll('.counselor-card').forEach(c => c.classList.remove('selected'));
                 
-                try {
-                    // Remove previous selection
-                    counselorCards.forEach(c => c.classList.remove('selected'));
+                // Select current card
+                card.classList.add('selected');
+                
+                // Add visual feedback
+                card.style.transform = 'scale(0.98)';
+                setTimeout(() => {
+                    card.style.transform = '';
+                }, 150);
+                
+                const nameElement = card.querySelector('.counselor-info h6');
+                const titleElement = card.querySelector('.counselor-title');
+                const avatarElement = card.querySelector('.avatar-img');
+                
+                if (nameElement && titleElement) {
+                    const changed = !bookingSystem.selectedCounselor || bookingSystem.selectedCounselor.id !== card.dataset.counselorId;
+                    bookingSystem.selectedCounselor = {
+                        id: card.dataset.counselorId || 'unknown',
+                        name: nameElement.textContent.trim(),
+                        title: titleElement.textContent.trim(),
+                        avatar: avatarElement ? avatarElement.src : ''
+                    };
+                    if (changed) {
+                        bookingSystem.selectedTime = null;
+                        bookingSystem.selectedSlotId = null;
+                    }
                     
-                    // Select current card
-                    this.classList.add('selected');
+                    console.log('Counselor selected:', bookingSystem.selectedCounselor);
                     
-                    // Add visual feedback
-                    this.style.transform = 'scale(0.98)';
-                    setTimeout(() => {
-                        this.style.transform = '';
-                    }, 150);
+                    renderTimeSlots();
+                    markAvailableDays();
+                    updateNavigationButtons();
+                    updateSummary();
                     
-                    // Store selection with better error handling
-                    const nameElement = this.querySelector('.counselor-info h6');
-                    const titleElement = this.querySelector('.counselor-title');
-                    const avatarElement = this.querySelector('.avatar-img');
+                    // Show success feedback
+                    showSuccessMessage(`${escapeHtml(bookingSystem.selectedCounselor.name)} selected!`);
                     
-                    if (nameElement && titleElement && avatarElement) {
-                        bookingSystem.selectedCounselor = {
-                            id: this.dataset.counselorId || 'unknown',
-                            name: nameElement.textContent.trim(),
-                            title: titleElement.textContent.trim(),
-                            avatar: avatarElement.src
-                        };
-                        
-                        console.log('Counselor selected:', bookingSystem.selectedCounselor);
-                        
-                        updateNavigationButtons();
-                        updateSummary();
-                        
-                        // Show success feedback
-                        showSuccessMessage(`${bookingSystem.selectedCounselor.name} selected!`);
-                        
-                        // Auto-advance after selection (with shorter delay)
-                        setTimeout(() => {
-                            if (bookingSystem.currentStep === 1) {
-                                nextStep();
-                            }
-                        }, 1200);
-                    } else {
-                        console.error('Could not find counselor information elements');
-                        showErrorMessage('Error selecting counselor. Please try again.');
-                    }
-                } catch (error) {
-                    console.error('Error in counselor selection:', error);
+                    // Auto-advance after selection (with shorter delay)
+                    setTimeout(() => {
+                        if (bookingSystem.currentStep === 1) {
+                            nextStep();
+                        }
+                    }, 1200);
+                } else {
+                    console.error('Could not find counselor information elements');
                     showErrorMessage('Error selecting counselor. Please try again.');
                 }
-            });
+            } catch (error) {
+                console.error('Error in counselor selection:', error);
+                showErrorMessage('Error selecting counselor. Please try again.');
+            }
         });
     }
 
@@ -392,6 +560,7 @@ document.addEventListener('DOMContentLoaded', function() {
             
             calendarHTML += '</div>';
             calendarGrid.innerHTML = calendarHTML;
+            markAvailableDays();
             
             // Add click handlers to calendar days
             calendarGrid.querySelectorAll('.calendar-day:not(.past):not(.empty)').forEach(day => {
@@ -424,6 +593,9 @@ document.addEventListener('DOMContentLoaded', function() {
                             
                             console.log('Date selected:', bookingSystem.selectedDate);
                             
+                            bookingSystem.selectedTime = null;
+                            bookingSystem.selectedSlotId = null;
+                            renderTimeSlots();
                             updateNavigationButtons();
                             updateSummary();
                             
@@ -443,51 +615,57 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Time slot selection
     function initializeTimeSlots() {
-        const timeSlots = document.querySelectorAll('.time-slot');
-        console.log('Found time slots:', timeSlots.length);
-        timeSlots.forEach(slot => {
-            if (!slot.classList.contains('booked')) {
-                slot.addEventListener('click', function(e) {
-                    e.preventDefault();
+        const grid = document.querySelector('.time-slots-grid');
+        if (grid) {
+            // Delegated, so slots rendered from server data work too
+            grid.addEventListener('click', function(e) {
+                const slot = e.target.closest('.time-slot');
+                if (!slot) return;
+                e.preventDefault();
+                if (slot.classList.contains('booked')) {
+                    showErrorMessage('This time slot is not available');
+                    return;
+                }
+                
+                try {
+                    // Remove previous selection
+                    grid.querySelectorAll('.time-slot').forEach(s => s.classList.remove('selected'));
                     
-                    try {
-                        // Remove previous selection
-                        timeSlots.forEach(s => s.classList.remove('selected'));
-                        
-                        // Select current slot
-                        this.classList.add('selected');
+                    // Select current slot
+                    slot.classList.add('selected');
+                    
+                    // Add visual feedback
+                    slot.style.transform = 'scale(0.95)';
+                    setTimeout(() => {
+                        slot.style.transform = '';
+                    }, 150);
+                    
+                    // Store selection
+                    const timeElement = slot.querySelector('.time');
+                    if (timeElement) {
+                        bookingSystem.selectedTime = timeElement.textContent.trim();
+                        bookingSystem.selectedSlotId = slot.dataset.slotId ? Number(slot.dataset.slotId) : null;
+                        console.log('Time slot selected:', bookingSystem.selectedTime);
                         
-                        // Add visual feedback
-                        this.style.transform = 'scale(0.95)';
-                        setTimeout(() => {
-                            this.style.transform = '';
-                        }, 150);
+                        updateNavigationButtons();
+                        updateSummary();
                         
-                        // Store selection
-                        const timeElement = this.querySelector('.time');
-                        if (timeElement) {
-                            bookingSystem.selectedTime = timeElement.textContent.trim();
-                            console.log('Time slot selected:', bookingSystem.selectedTime);
-                            
-                            updateNavigationButtons();
-                            updateSummary();
-                            
-                            showSuccessMessage(`${bookingSystem.selectedTime} selected!`);
-                        } else {
-                            console.error('Could not find time element');
-                            showErrorMessage('Error selecting time. Please try again.');
-                        }
-                    } catch (error) {
-                        console.error('Error in time slot selection:', error);
+                        showSuccessMessage(`${bookingSystem.selectedTime} selected!`);
+                    } else {
+                        console.error('Could not find time element');
                         showErrorMessage('Error selecting time. Please try again.');
                     }
-                });
-            } else {
+                } catch (error) {
+                    console.error('Error in time slot selection:', error);
+                    showErrorMessage('Error selecting time. Please try again.');
+                }
+            });
+            grid.querySelectorAll('.time-slot.booked').forEach(slot => {
                 // Make booked slots clearly non-interactive
                 slot.style.cursor = 'not-allowed';
                 slot.title = 'This time slot is not available';
-            }
-        });
+            });
+        }
         
         // Session duration selection
         const durationInputs = document.querySelectorAll('input[name="duration"]');
@@ -551,7 +729,7 @@ document.addEventListener('DOMContentLoaded', function() {
             summaryHTML += `
                 <div class="summary-item">
                     <span class="label">Counselor</span>
-                    <span class="value">${bookingSystem.selectedCounselor.name}</span>
+                    <span class="value">${escapeHtml(bookingSystem.selectedCounselor.name)}</span>
                 </div>
             `;
         }
@@ -586,6 +764,7 @@ document.addEventListener('DOMContentLoaded', function() {
         `;
         
         summary.innerHTML = summaryHTML;
+        saveState();
     }
 
     // Navigation functions
@@ -679,50 +858,68 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // Booking confirmation
-    function confirmBooking() {
-        try {
-            // Show loading state
-            const confirmBtn = document.querySelector('.btn-confirm');
-            if (confirmBtn) {
-                confirmBtn.classList.add('loading');
-                confirmBtn.innerHTML = '<i class="bi bi-hourglass-split me-2"></i>Confirming...';
-                confirmBtn.disabled = true;
+    function setFormDisabled(disabled) {
+        document.querySelectorAll('input, button, textarea').forEach(el => {
+            if (!el.classList.contains('btn-confirm')) {
+                el.disabled = disabled;
             }
-            
-            // Disable all form elements during confirmation
-            document.querySelectorAll('input, button, textarea').forEach(el => {
-                if (!el.classList.contains('btn-confirm')) {
-                    el.disabled = true;
-                }
+        });
+        
+        const confirmBtn = document.querySelector('.btn-confirm');
+        if (confirmBtn) {
+            confirmBtn.classList.toggle('loading', disabled);
+            confirmBtn.innerHTML = disabled
+                ? '<i class="bi bi-hourglass-split me-2"></i>Confirming...'
+                : '<i class="bi bi-check-circle"></i> Confirm Booking';
+            confirmBtn.disabled = disabled;
+        }
+    }
+
+    async function confirmBooking() {
+        if (!bookingSystem.selectedSlotId) {
+            showErrorMessage('Please choose one of the available times.');
+            showStep(2);
+            return;
+        }
+        
+        setFormDisabled(true);
+        showSuccessMessage('Processing your appointment...');
+        const notes = document.getElementById('additional-notes');
+        
+        try {
+            const response = await fetch(bookingUrls.book, {
+                method: 'POST',
+                credentials: 'same-origin',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': getCookie('csrftoken') || ''
+                },
+                body: JSON.stringify({
+                    slot_id: bookingSystem.selectedSlotId,
+                    notes: notes ? notes.value : ''
+                })
             });
+            const data = await response.json().catch(() => ({}));
             
-            console.log('Starting booking confirmation...');
-            console.log('Booking details:', bookingSystem);
-            
-            // Show progress message
-            showSuccessMessage('Processing your appointment...');
-            
-            // Simulate API call with realistic delay
-            setTimeout(() => {
+            if (response.status === 201) {
                 console.log('Booking confirmed successfully');
                 showConfirmationPage();
-            }, 2500);
-            
+                return;
+            }
+            setFormDisabled(false);
+            if (response.status === 409 || response.status === 410) {
+                // Someone else got the slot, or it can no longer be booked;
+                // show the current free times
+                bookingSystem.selectedSlotId = null;
+                bookingSystem.selectedTime = null;
+                showStep(2);
+                loadBookingData();
+            }
+            showErrorMessage(data.error || 'Failed to confirm booking. Please try again.');
         } catch (error) {
             console.error('Error confirming booking:', error);
+            setFormDisabled(false);
             showErrorMessage('Failed to confirm booking. Please try again.');
-            
-            // Re-enable form elements
-            document.querySelectorAll('input, button, textarea').forEach(el => {
-                el.disabled = false;
-            });
-            
-            const confirmBtn = document.querySelector('.btn-confirm');
-            if (confirmBtn) {
-                confirmBtn.classList.remove('loading');
-                confirmBtn.innerHTML = '<i class="bi bi-check-circle"></i> Confirm Booking';
-                confirmBtn.disabled = false;
-            }
         }
     }
 
@@ -771,10 +968,10 @@ document.addEventListener('DOMContentLoaded', function() {
                             <div class="detail-row">
                                 <i class="bi bi-person-check text-primary"></i>
                                 <div class="counselor-preview">
-                                    <img src="${bookingSystem.selectedCounselor.avatar}" alt="${bookingSystem.selectedCounselor.name}" class="counselor-thumb">
+                                    <img src="${escapeHtml(bookingSystem.selectedCounselor.avatar)}" alt="${escapeHtml(bookingSystem.selectedCounselor.name)}" class="counselor-thumb">
                                     <div>
-                                        <strong>${bookingSystem.selectedCounselor.name}</strong><br>
-                                        <small class="text-muted">${bookingSystem.selectedCounselor.title}</small>
+                                        <strong>${escapeHtml(bookingSystem.selectedCounselor.name)}</strong><br>
+                                        <small class="text-muted">${escapeHtml(bookingSystem.selectedCounselor.title)}</small>
                                     </div>
                                 </div>
                             </div>
@@ -890,6 +1087,8 @@ document.addEventListener('DOMContentLoaded', function() {
         initializeNavigation();
         initializeAnimations();
         updateSummary();
+        loadBookingData();
+        watchChanges();
         
         // Add keyboard shortcut for debugging
         document.addEventListener('keydown', function(e) {
@@ -905,23 +1104,6 @@ document.addEventListener('DOMContentLoaded', function() {
                     stepValid: isStepValid(bookingSystem.currentStep)
                 });
             }
-            
-            // Quick jump to step 4 for testing (Ctrl+4)
-            if (e.ctrlKey && e.key === '4') {
-                e.preventDefault();
-                console.log('Quick jump to step 4 for testing');
-                // Set dummy data for testing
-                bookingSystem.selectedCounselor = {
-                    id: 'test',
-                    name: 'Test Counselor',
-                    title: 'Test Therapist',
-                    avatar: 'https://via.placeholder.com/60'
-                };
-                bookingSystem.selectedDate = '2023-12-01';
-                bookingSystem.selectedTime = '2:00 PM';
-                showStep(4);
-                showSuccessMessage('Jumped to Step 4 for testing (Ctrl+4)');
-            }
         });
         
         console.log('✅ Booking System Initialization Complete!');
@@ -944,10 +1126,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    // Auto-save form data
-    setInterval(() => {
-        localStorage.setItem('bookingFormData', JSON.stringify(bookingSystem));
-    }, 30000); // Save every 30 seconds
+    // Form data is saved whenever the summary changes (see updateSummary)
 
     // Load saved data on page load
     const savedData = localStorage.getItem('bookingFormData');